@@ -0,0 +1,96 @@
+"""Micro-benchmark for the per-card / per-listing parser helpers.
+
+Compares the precompiled lookup layer in src.parser against the previous
+per-call implementations (kept here verbatim as the baseline).
+
+    python -m benchmarks.bench_parser_helpers
+"""
+import re
+import timeit
+import unidecode
+from urllib.parse import urlparse
+from src import parser
+
+URLS = [
+    "https://batdongsan.com.vn/ban-can-ho-chung-cu-mini-phuong-1/can-ho-dep-pr41234567",
+    "https://batdongsan.com.vn/ban-nha-biet-thu-lien-ke-duong-do-muoi-phuong-duong-quan/mot-can-pr42518171",
+    "https://batdongsan.com.vn/cho-thue-phong-tro-quan-7/phong-tro-gia-re-pr40000001",
+    "https://batdongsan.com.vn/cho-thue-van-phong-duong-nguyen-hue/van-phong-pr40000002",
+    "https://batdongsan.com.vn/ban-dat-nen-du-an-long-an/dat-nen-pr40000003",
+    "https://batdongsan.com.vn/nha-dat-ban",
+]
+
+LABELS = [
+    "Khoảng giá", "Diện tích", "Số phòng ngủ", "Số phòng tắm, vệ sinh", "Số tầng",
+    "Hướng nhà", "Hướng ban công", "Mặt tiền", "Đường vào", "Pháp lý", "Nội thất",
+    "Ngày đăng", "Ngày hết hạn", "Loại tin", "Mã tin",
+]
+
+HTML = (
+    "<html><head><script>" + "var x = 1;" * 2000
+    + 'window.pageData = {"latitude": 10.7345, "longitude": 106.7215};</script></head></html>'
+)
+
+
+def legacy_normalize_key(key):
+    key = unidecode.unidecode(key).lower()
+    key = re.sub(r'[\s,]+', '_', key)
+    key = re.sub(r'[^\w_]', '', key)
+    key = re.sub(r'_+', '_', key)
+    return key.strip('_')
+
+
+def legacy_classify_property_type(url):
+    path = urlparse(url).path.strip('/').lower()
+    sorted_types = sorted(parser.ALL_PROPERTY_TYPES.items(), key=lambda x: len(x[0]), reverse=True)
+    for path_segment, category in sorted_types:
+        if path.startswith(path_segment):
+            is_full_match = len(path) == len(path_segment)
+            if is_full_match or path[len(path_segment)] in ('-'):
+                return category
+    return "Unknown"
+
+
+def legacy_classify_transaction_type(url):
+    path = urlparse(url).path.strip('/').lower()
+    for transaction_type, pattern in parser.TRANSACTION_TYPE_PATTERNS.items():
+        if re.match(pattern, path):
+            return transaction_type
+    return "Unknown"
+
+
+def legacy_get_coordinate(html_content):
+    geo = {}
+    for key in ['latitude', 'longitude']:
+        pattern = rf'["\']?{re.escape(key)}["\']?\s*:\s*(-?[\d\.]+)'
+        match = re.search(pattern, html_content)
+        if match:
+            geo[key] = float(match.group(1).replace(' ', ''))
+    return geo
+
+
+CASES = [
+    ("classify_property_type", legacy_classify_property_type, parser.classify_property_type, URLS),
+    ("classify_transaction_type", legacy_classify_transaction_type, parser.classify_transaction_type, URLS),
+    ("normalize_key", legacy_normalize_key, parser.normalize_key, LABELS),
+    ("get_coordinate", legacy_get_coordinate, parser.get_coordinate, [HTML]),
+]
+
+
+def run(number=2000):
+    print(f"{'helper':<28}{'legacy us/call':>16}{'new us/call':>14}{'speedup':>10}")
+    for name, legacy, current, inputs in CASES:
+        for value in inputs:
+            assert legacy(value) == current(value), (name, value)
+
+        calls = number * len(inputs)
+        legacy_time = timeit.timeit(lambda: [legacy(v) for v in inputs], number=number)
+        current_time = timeit.timeit(lambda: [current(v) for v in inputs], number=number)
+        print(
+            f"{name:<28}{legacy_time / calls * 1e6:>16.2f}{current_time / calls * 1e6:>14.2f}"
+            f"{legacy_time / current_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    run()
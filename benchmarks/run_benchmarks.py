@@ -0,0 +1,302 @@
+"""Offline benchmark suite for the parser and cleaner.
+
+Runs every stage over the saved pages in benchmarks/fixtures, reports
+records/sec, p50/p99 latency per record and peak memory, and compares the
+numbers with benchmarks/baseline.json. Exits with status 1 when a stage regresses past the
+allowed thresholds, so it can gate CI.
+
+    python -m benchmarks.run_benchmarks                     # compare with baseline
+    python -m benchmarks.run_benchmarks --update-baseline   # record a new baseline
+
+Throughput and p99 are gated relative to a reference stage that runs the
+same kind of work (stdlib HTML tokenizing and JSON round-trips over the
+fixtures) in the same run and never touches src/. The baseline stores those
+ratios, so it carries over between machines; the absolute numbers are
+printed and saved for information only. Peak memory is measured with tracemalloc, so it covers Python allocations only
+(libxml2 trees built by lxml are not included).
+"""
+import argparse
+import gc
+import json
+from html.parser import HTMLParser
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import pandas as pd
+from src.parser import parse_detail_page, parse_list_cards
+from src.parser_lxml import compare_backends
+from src.cleaner import process_rent_item, process_sale_item
+from src.cleaner_frame import clean_frame, clean_records
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DISTINCT_ROWS = 20_000
+REFERENCE_STAGE = "reference"
+
+
+def load_fixtures():
+    with open(os.path.join(FIXTURE_DIR, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    fixtures = {}
+    for kind, items in manifest.items():
+        fixtures[kind] = []
+        for item in items:
+            with open(os.path.join(FIXTURE_DIR, item["file"]), "r", encoding="utf-8") as f:
+                fixtures[kind].append((item["file"], f.read(), item["url"]))
+    return fixtures
+
+
+def clean_item(item):
+    if item.get("transaction_type") == "rent":
+        return process_rent_item(item)
+    return process_sale_item(item)
+
+
+def distinct_records(records, count, seed=17):
+    """Copies of the fixture records with distinct prices, areas, dates and addresses.
+
+    Repeating the fixtures verbatim would let per-value shortcuts (the
+    gazetteer cache, factorized address columns) hit on every row, which real
+    scrapes never do."""
+    rng = random.Random(seed)
+    streets = [f"Đường số {i}" for i in range(300)]
+    wards = [f"Phường {i}" for i in range(1, 30)] + [f"Xã Tân {i}" for i in range(50)]
+    districts = [f"Quận {i}" for i in range(1, 13)] + ["Bình Thạnh", "Gò Vấp", "Cầu Giấy", "Long Thành"]
+    cities = ["Hồ Chí Minh", "Hà Nội", "Đà Nẵng", "Đồng Nai", "Hải Phòng"]
+
+    def decimal(value):
+        return f"{value:g}".replace(".", ",")
+
+    rows = []
+    for i in range(count):
+        row = dict(records[i % len(records)])
+        rent = row.get("transaction_type") == "rent"
+        row["post_id"] = str(40_000_000 + i)
+        row["price"] = (f"{decimal(rng.randint(30, 9000) / 100)} triệu/tháng" if rent
+                        else f"{decimal(rng.randint(80, 30000) / 100)} tỷ")
+        row["price_per_spm"] = "" if rent else f"~{decimal(rng.randint(100, 30000) / 100)} triệu/m²"
+        row["area"] = f"{decimal(rng.randint(180, 12000) / 10)} m²"
+        row["date_posted"] = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.choice([2024, 2025])}"
+        row["date_expired"] = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2026"
+        row["address"] = (f"{rng.choice(streets)} {rng.randint(1, 999)}, {rng.choice(wards)}, "
+                          f"{rng.choice(districts)}, {rng.choice(cities)}")
+        row["spec"] = {**row.get("spec", {}), "bedroom": f"{rng.randint(1, 8)} phòng"}
+        rows.append(row)
+    return rows
+
+
+class _Tokenizer(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.tokens = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.tokens += 1
+
+    def handle_data(self, data):
+        self.tokens += 1
+
+
+def reference_work(case):
+    """Machine-speed yardstick: parser-like string work that does not depend on src/."""
+    html, record = case
+    tokenizer = _Tokenizer()
+    tokenizer.feed(html)
+    tokenizer.close()
+    return tokenizer.tokens, json.loads(json.dumps(record, ensure_ascii=False))
+
+
+def build_stages(fixtures):
+    details = fixtures["detail"]
+    lists = fixtures["list"]
+    records = [parse_detail_page(html, url) for _, html, url in details]
+    distinct = distinct_records(records, DISTINCT_ROWS)
+
+    return {
+        REFERENCE_STAGE: (
+            [(html, record) for (_, html, _), record in zip(details, records)],
+            reference_work,
+            lambda case, result: 1,
+        ),
+        "parse_detail[bs4]": (
+            [(html, url) for _, html, url in details],
+            lambda case: parse_detail_page(case[0], case[1], backend="bs4"),
+            lambda case, result: 1,
+        ),
+        "parse_detail[lxml]": (
+            [(html, url) for _, html, url in details],
+            lambda case: parse_detail_page(case[0], case[1], backend="lxml"),
+            lambda case, result: 1,
+        ),
+        "parse_list": (
+            [(html, url) for _, html, url in lists],
+            lambda case: parse_list_cards(case[0], case[1]),
+            lambda case, result: len(result),
+        ),
+        "clean": (
+            records,
+            clean_item,
+            lambda case, result: 1,
+        ),
+        # Same distinct rows through both cleaners, so their records/s compare directly.
+        "clean[distinct]": (
+            [distinct],
+            lambda rows: [clean_item(row) for row in rows],
+            lambda case, result: len(result),
+        ),
+        "clean_frame": (
+            [pd.DataFrame(distinct, dtype=object)],
+            clean_frame,
+            lambda case, result: len(result),
+        ),
+    }
+
+
+def time_stage(cases, func, count, iterations):
+    latencies = []
+    records = 0
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for case in cases:
+                t0 = time.perf_counter()
+                result = func(case)
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                n = count(case, result)
+                # Per record, so batch stages (a whole list page, 20k rows) compare with single-record ones.
+                latencies.append(elapsed_ms / max(n, 1))
+                records += n
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+
+    latencies.sort()
+    return records / elapsed, latencies
+
+
+def run_stage(cases, func, count, iterations, repeat):
+    # Best of several runs: noise on a shared runner only ever makes a run slower.
+    runs = [time_stage(cases, func, count, iterations) for _ in range(repeat)]
+    throughput = max(rate for rate, _ in runs)
+    p50 = min(statistics.median(latencies) for _, latencies in runs)
+    p99 = min(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] for _, latencies in runs)
+
+    tracemalloc.start()
+    for case in cases:
+        func(case)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "records_per_sec": round(throughput, 1),
+        "p50_ms": round(p50, 4),
+        "p99_ms": round(p99, 4),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def check_equivalence(fixtures):
+    failures = []
+    for name, html, _ in fixtures["detail"]:
+        diff = compare_backends(html)
+        if diff:
+            failures.append(f"{name}: lxml backend differs on {', '.join(diff)}")
+
+    records = [parse_detail_page(html, url) for _, html, url in fixtures["detail"]]
+    records += distinct_records(records, 2000)
+    if clean_records(records) != [clean_item(record) for record in records]:
+        failures.append("clean_frame output differs from the per-item cleaner")
+    return failures
+
+
+def add_relative(results):
+    """Express every stage against REFERENCE_STAGE from the same run."""
+    reference = results[REFERENCE_STAGE]
+    for stats in results.values():
+        stats["relative_speed"] = round(stats["records_per_sec"] / reference["records_per_sec"], 4)
+        # Against the reference p99, which absorbs the same preemption and noise.
+        stats["relative_p99"] = round(stats["p99_ms"] / reference["p99_ms"], 4)
+    return results
+
+
+def compare(results, baseline, max_slowdown, max_p99_increase, max_memory_increase, p99_floor_ms):
+    regressions = []
+    # The floor absorbs scheduler noise; convert it to reference units for this machine.
+    p99_floor = p99_floor_ms / results[REFERENCE_STAGE]["p99_ms"]
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or "relative_speed" not in previous or name == REFERENCE_STAGE:
+            # Absolute-only entries come from before the reference stage; re-record them.
+            continue
+        if current["relative_speed"] < previous["relative_speed"] * (1 - max_slowdown):
+            regressions.append(
+                f"{name}: throughput {current['relative_speed']}x reference "
+                f"< baseline {previous['relative_speed']}x"
+            )
+        p99_limit = max(previous["relative_p99"] * (1 + max_p99_increase), previous["relative_p99"] + p99_floor)
+        if current["relative_p99"] > p99_limit:
+            regressions.append(
+                f"{name}: p99 {current['relative_p99']}x reference p99 > baseline {previous['relative_p99']}x"
+            )
+        if current["peak_kb"] > previous["peak_kb"] * (1 + max_memory_increase):
+            regressions.append(f"{name}: peak memory {current['peak_kb']}KB > baseline {previous['peak_kb']}KB")
+    return regressions
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--iterations", type=int, default=50)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--baseline", default=BASELINE_PATH)
+    arg_parser.add_argument("--update-baseline", action="store_true")
+    arg_parser.add_argument("--max-slowdown", type=float, default=0.25)
+    arg_parser.add_argument("--max-p99-increase", type=float, default=1.0)
+    arg_parser.add_argument("--max-memory-increase", type=float, default=0.3)
+    arg_parser.add_argument("--p99-floor-ms", type=float, default=1.0,
+                            help="ignore p99 increases smaller than this, to absorb scheduler noise")
+    args = arg_parser.parse_args(argv)
+
+    fixtures = load_fixtures()
+    failures = check_equivalence(fixtures)
+
+    results = {}
+    for name, (cases, func, count) in build_stages(fixtures).items():
+        results[name] = run_stage(cases, func, count, args.iterations, args.repeat)
+    add_relative(results)
+
+    print(f"{'stage':<22}{'records/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak KB':>10}{'x ref':>10}{'p99/ref':>10}")
+    for name, stats in results.items():
+        print(
+            f"{name:<22}{stats['records_per_sec']:>12}{stats['p50_ms']:>10}"
+            f"{stats['p99_ms']:>10}{stats['peak_kb']:>10}"
+            f"{stats['relative_speed']:>10}{stats['relative_p99']:>10}"
+        )
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures += compare(
+            results, baseline, args.max_slowdown, args.max_p99_increase,
+            args.max_memory_increase, args.p99_floor_ms
+        )
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
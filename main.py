@@ -1,7 +1,15 @@
 import time
 from src.mongo_client import MongoDBClient
-from src.scraper import init_browser, process_multiple_pages
-from src.utils import load_config, get_logger
+from src.scraper import init_browser_pool, close_browser_pool, process_multiple_pages
+from src.fetcher import HttpFetcher
+from src.seen_index import SeenIndex
+from src.writer import BufferedPostWriter
+from src.rate_limiter import AdaptiveRateLimiter
+from src.checkpoint import CheckpointStore
+from src.parser import set_default_backend
+from src.gazetteer import configure_gazetteer
+from src.archive import configure_html_archive, close_html_archive
+from src.utils import load_config, get_logger, configure_raw_sink, close_raw_sink
 
 logger = get_logger("main")
 
@@ -9,7 +17,9 @@ def main():
     logger.info("=== STARTING SCRAPER SYSTEM ===")
 
     mongo = None
-    driver = None
+    drivers = []
+    fetcher = None
+    writer = None
     total_new_records = 0
     total_skipped = 0
     pages_processed = 0
@@ -20,12 +30,70 @@ def main():
         cfg = load_config()
         sc_cfg = cfg.get('scraper', {})
         targets = cfg.get('targets', [])
+        set_default_backend(cfg.get('parser', {}).get('backend', 'bs4'))
+        configure_gazetteer(cfg.get('parser', {}).get('gazetteer'))
+
+        seen_cfg = cfg.get('seen_index', {})
+        if seen_cfg.get('enabled', False):
+            mongo.attach_seen_index(SeenIndex(
+                path=seen_cfg.get('path', 'data/seen_ids.tsv'),
+                capacity=seen_cfg.get('capacity', 2_000_000),
+                error_rate=seen_cfg.get('error_rate', 0.001)
+            ))
 
         if not targets:
             logger.error("No targets found in config.yaml")
             return
 
-        driver = init_browser(headless=sc_cfg.get('headless', False))
+        raw_cfg = cfg.get('raw_sink', {})
+        configure_raw_sink(
+            directory=raw_cfg.get('directory', 'data/raw'),
+            rotate=raw_cfg.get('rotate', 'daily'),
+            max_bytes=raw_cfg.get('max_mb', 256) * 1024 * 1024,
+            compression=raw_cfg.get('compression'),
+            fsync_every=raw_cfg.get('fsync_every', 50)
+        )
+
+        archive_cfg = cfg.get('html_archive', {})
+        if archive_cfg.get('enabled', False):
+            configure_html_archive(
+                root=archive_cfg.get('root', 'data/archive'),
+                shard_max_mb=archive_cfg.get('shard_max_mb', 256),
+                codec=archive_cfg.get('codec')
+            )
+
+        writer_cfg = cfg.get('writer', {})
+        writer = BufferedPostWriter(
+            mongo,
+            max_size=writer_cfg.get('batch_size', 50),
+            max_interval=writer_cfg.get('flush_interval', 30),
+            history_limit=writer_cfg.get('history_limit', 20)
+        )
+
+        limiter = AdaptiveRateLimiter(**sc_cfg.get('rate_limit', {}))
+
+        checkpoint = None
+        cp_cfg = cfg.get('checkpoint', {})
+        if cp_cfg.get('enabled', False):
+            checkpoint = CheckpointStore(
+                cp_cfg.get('path', 'data/checkpoints.json'),
+                max_page_attempts=cp_cfg.get('max_page_attempts', 3)
+            )
+
+        http_cfg = sc_cfg.get('http_fetch', {})
+        if http_cfg.get('enabled', False):
+            fetcher = HttpFetcher(
+                concurrency=http_cfg.get('concurrency', 8),
+                timeout=http_cfg.get('timeout', 20),
+                limiter=limiter
+            )
+
+        drivers = init_browser_pool(
+            size=sc_cfg.get('workers', 1),
+            headless=sc_cfg.get('headless', False),
+            lean=sc_cfg.get('lean', False),
+            page_load_strategy=sc_cfg.get('page_load_strategy')
+        )
 
         for target in targets:
             if not target.get('enabled', True):
@@ -33,9 +101,14 @@ def main():
                 continue
 
             new_record, skipped_record, page_process = process_multiple_pages(
-                driver=driver,
+                driver=drivers[0],
                 target=target,
-                mongo_client=mongo
+                mongo_client=mongo,
+                pool=drivers,
+                fetcher=fetcher,
+                writer=writer,
+                limiter=limiter,
+                checkpoint=checkpoint
             )
 
             total_new_records += new_record
@@ -46,12 +119,30 @@ def main():
         logger.critical(f"SYSTEM CRASH: {e}", exc_info=True)
 
     finally:
-        if driver is not None:
+        if fetcher is not None:
+            try:
+                fetcher.close()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP fetcher: {e}")
+
+        if drivers:
+            close_browser_pool(drivers)
+            logger.info(f"Closed {len(drivers)} browser(s).")
+
+        total_inserted = 0
+        total_updated = 0
+        total_write_duplicates = 0
+        if writer is not None:
             try:
-                driver.quit()
-                logger.info("Browser closed successfully.")
+                writer.close()
             except Exception as e:
-                logger.warning(f"Failed to close browser: {e}")
+                logger.warning(f"Failed to flush pending posts: {e}")
+            total_inserted = writer.inserted
+            total_updated = writer.updated
+            total_write_duplicates = writer.unchanged
+
+        close_raw_sink()
+        close_html_archive()
 
         if mongo is not None:
             try:
@@ -66,8 +157,10 @@ def main():
 
         logger.info(" === SUMMARY ===")
         logger.info(f" Total pages processed: {pages_processed}")
-        logger.info(f" Total new records added: {total_new_records}")
-        logger.info(f" Total items duplicated: {total_skipped}")
+        logger.info(f" Total records scraped: {total_new_records}")
+        logger.info(f" Total new records added: {total_inserted}")
+        logger.info(f" Total changed records updated: {total_updated}")
+        logger.info(f" Total items duplicated: {total_skipped + total_write_duplicates}")
         logger.info(f" Total Duration: {minutes}m {seconds}s")
         logger.info("=== PROCESS FINISHED ===")
 
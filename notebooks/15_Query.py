@@ -1,6 +1,12 @@
+import os
+import sys
 from pymongo import MongoClient
 import re # Thư viện xử lý biểu thức chính quy (tìm kiếm chuỗi)
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.gazetteer import location_filter # Tên địa danh -> mã hành chính (trường location.* có index)
+from src.mongo_client import search_query # Chỉ sinh query dùng được index (xem INDEXES)
+
 # 1. Kết nối đến MongoDB
 # Nếu dùng Cloud, bạn thay chuỗi kết nối này bằng URI trong file .env của bạn
 client = MongoClient('mongodb://localhost:27017/') 
@@ -30,35 +36,31 @@ print(f"Tìm thấy {count_land} tin đất nền.")
 
 # 5. Tìm nhà tại Quận 7 
 print("\n5. Các tin tại Quận 7:")
-query_q7 = {"address": {"$regex": "Quận 7", "$options": "i"}}
+query_q7 = location_filter(province="Hồ Chí Minh", district="Quận 7")
 for doc in col.find(query_q7).limit(2):
     print(f"{doc.get('address')}")
 
 # 6. Tìm nhà tại Hà Nội
 print("\n6. Số lượng tin tại Hà Nội:")
-count_hn = col.count_documents({"address": {"$regex": "Hà Nội", "$options": "i"}})
+count_hn = col.count_documents(location_filter(province="Hà Nội"))
 print(f" {count_hn} tin.")
 
 # 7. Tìm các tin thuộc dự án Vinhomes (Tìm trong title hoặc project_info)
 print("\n7. Các tin liên quan đến Vinhomes:")
-query_vin = {
-    "$or": [
-        {"title": {"$regex": "Vinhomes", "$options": "i"}},
-        {"project_info.name": {"$regex": "Vinhomes", "$options": "i"}}
-    ]
-}
+# Text index trên title + project_info.name thay cho 2 $regex quét toàn bộ collection
+query_vin = search_query(text="Vinhomes")
 for doc in col.find(query_vin).limit(2):
     print(f"{doc.get('title')}")
 
 # 8. Tìm nhà có đúng 2 phòng ngủ
 print("\n8. Nhà có 2 phòng ngủ:")
-# Lưu ý: Dữ liệu của bạn lưu là chuỗi "2 phòng"
-count_2pn = col.count_documents({"spec.bedroom": "2 phòng"})
+# bedrooms là số nguyên đã làm sạch lúc ghi (spec.bedroom vẫn giữ chuỗi "2 phòng")
+count_2pn = col.count_documents({"bedrooms": 2})
 print(f"{count_2pn}")
 
-# 9. Tìm nhà có từ 3 phòng ngủ trở lên (Dùng Regex bắt số 3,4,5...)
+# 9. Tìm nhà có từ 3 phòng ngủ trở lên (so sánh số, bắt cả 10+ phòng)
 print("\n9. Nhà có từ 3 phòng ngủ trở lên:")
-query_3pn = {"spec.bedroom": {"$regex": "^[3-9] phòng"}}
+query_3pn = {"bedrooms": {"$gte": 3}}
 for doc in col.find(query_3pn).limit(2):
     print(f"{doc.get('title')} ({doc.get('spec', {}).get('bedroom')})")
 
@@ -79,11 +81,9 @@ print(f"Có {count_deal} tin.")
 
 # 13. Lọc đa điều kiện: Cho thuê + Căn hộ + Quận Bình Thạnh
 print("\n13. Căn hộ cho thuê tại Bình Thạnh:")
-query_complex = {
-    "transaction_type": "rent",
-    "property_category": "Apartment",
-    "address": {"$regex": "Bình Thạnh", "$options": "i"}
-}
+query_complex = search_query(
+    transaction_type="rent", category="Apartment", province="Hồ Chí Minh", district="Bình Thạnh"
+)
 for doc in col.find(query_complex).limit(2):
     print(doc.get('title'))
 
@@ -0,0 +1,208 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from src.utils import get_logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = get_logger("archive")
+
+INDEX_FILE = "index.jsonl"
+
+
+def compress(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def read_blob(root, entry):
+    with open(os.path.join(root, entry["shard"]), "rb") as f:
+        f.seek(entry["offset"])
+        data = f.read(entry["length"])
+    return decompress(data, entry["codec"]).decode("utf-8")
+
+
+def _index_lines(root):
+    path = os.path.join(root, INDEX_FILE)
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            if line.strip():
+                yield line_no, json.loads(line)
+
+
+def iter_entries(root, latest_only=True):
+    """Stream index entries in the order they were archived.
+
+    With latest_only, only the last entry of each (post_id, transaction_type)
+    is yielded. That takes a first pass keeping one line number per post;
+    the entries themselves are never all held in memory."""
+    if not latest_only:
+        for _, entry in _index_lines(root):
+            yield entry
+        return
+    latest = {}
+    for line_no, entry in _index_lines(root):
+        latest[(entry["post_id"], entry.get("transaction_type"))] = line_no
+    keep = set(latest.values())
+    del latest
+    for line_no, entry in _index_lines(root):
+        if line_no in keep:
+            yield entry
+
+
+class HtmlArchive:
+    """Content-addressed store of raw detail-page HTML.
+
+    Each page is compressed on its own and appended to a shard file, so any
+    entry can be read back with a single seek. index.jsonl maps post_id to the
+    sha256 of its HTML; identical content is stored and indexed only once.
+    Only the set of stored digests is kept in memory; the index itself is
+    streamed from disk (iter_entries)."""
+
+    def __init__(self, root="data/archive", shard_max_mb=256, codec=None):
+        if codec is None:
+            codec = "zstd" if zstandard is not None else "gzip"
+        if codec == "zstd" and zstandard is None:
+            raise ImportError("zstandard is required for zstd archives")
+
+        self.root = root
+        self.shard_max_bytes = shard_max_mb * 1024 * 1024
+        self.codec = codec
+        self._lock = threading.Lock()
+        self._shard_handle = None
+        self._shard_name = None
+        self._index_handle = None
+        self._digests = set()
+
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        for _, entry in _index_lines(self.root):
+            # 32-byte digests rather than entry dicts: ~100 bytes per page instead of ~1.5 KB.
+            self._digests.add(bytes.fromhex(entry["sha256"]))
+
+    def __len__(self):
+        return len(self._digests)
+
+    def _next_shard(self):
+        existing = sorted(name for name in os.listdir(self.root) if name.startswith("shard_"))
+        if existing:
+            last = existing[-1]
+            if os.path.getsize(os.path.join(self.root, last)) < self.shard_max_bytes:
+                return last
+            number = int(last.split("_")[1].split(".")[0]) + 1
+        else:
+            number = 0
+        return f"shard_{number:05d}.bin"
+
+    def _get_shard(self):
+        if self._shard_handle is not None and self._shard_handle.tell() >= self.shard_max_bytes:
+            self._shard_handle.close()
+            self._shard_handle = None
+        if self._shard_handle is None:
+            self._shard_name = self._next_shard()
+            self._shard_handle = open(os.path.join(self.root, self._shard_name), "ab")
+        return self._shard_handle
+
+    def _get_index(self):
+        if self._index_handle is None:
+            self._index_handle = open(os.path.join(self.root, INDEX_FILE), "a", encoding="utf-8")
+        return self._index_handle
+
+    def put(self, post_id, url, html_content, transaction_type=None):
+        raw = html_content.encode("utf-8")
+        sha = hashlib.sha256(raw).hexdigest()
+
+        digest = bytes.fromhex(sha)
+        with self._lock:
+            # A detail page embeds its own post id, so identical HTML is an unchanged
+            # page of the same post: nothing to store or index. (A page that changes and
+            # later reverts byte for byte keeps its newer index entry as the latest.)
+            if digest in self._digests:
+                return sha
+
+            shard = self._get_shard()
+            offset = shard.tell()
+            data = compress(raw, self.codec)
+            shard.write(data)
+            shard.flush()
+
+            entry = {
+                "post_id": str(post_id),
+                "transaction_type": transaction_type,
+                "url": url,
+                "sha256": sha,
+                "shard": self._shard_name,
+                "offset": offset,
+                "length": len(data),
+                "codec": self.codec,
+                "archived_at": datetime.now().isoformat(),
+            }
+            index = self._get_index()
+            index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            index.flush()
+            self._digests.add(digest)
+            return sha
+
+    def entries(self, latest_only=True):
+        return iter_entries(self.root, latest_only)
+
+    def get(self, post_id, transaction_type=None):
+        """Latest archived HTML of a post. Scans the index, so meant for inspection rather than bulk reads."""
+        found = None
+        for _, entry in _index_lines(self.root):
+            if entry["post_id"] == str(post_id) and entry.get("transaction_type") == transaction_type:
+                found = entry
+        return read_blob(self.root, found) if found else None
+
+    def close(self):
+        with self._lock:
+            for handle in (self._shard_handle, self._index_handle):
+                if handle is not None:
+                    handle.close()
+            self._shard_handle = None
+            self._index_handle = None
+
+
+_archive = None
+
+
+def configure_html_archive(**kwargs):
+    global _archive
+    if _archive is not None:
+        _archive.close()
+    _archive = HtmlArchive(**kwargs)
+    return _archive
+
+
+def close_html_archive():
+    global _archive
+    if _archive is not None:
+        _archive.close()
+        _archive = None
+
+
+def archive_html(post_id, url, html_content, transaction_type=None):
+    if _archive is None:
+        return None
+    try:
+        return _archive.put(post_id, url, html_content, transaction_type)
+    except Exception as e:
+        logger.warning(f"Failed to archive HTML for {post_id}: {e}")
+        return None
@@ -0,0 +1,66 @@
+import argparse
+from src.cleaner import typed_fields
+from src.gazetteer import configure_gazetteer, location_fields
+from src.utils import get_logger
+
+logger = get_logger("backfill")
+
+TYPED_SOURCE_FIELDS = {
+    "transaction_type": 1, "price": 1, "price_per_spm": 1, "area": 1,
+    "spec": 1, "date_posted": 1, "date_expired": 1, "address": 1,
+}
+
+
+def _backfill(mongo_client, query, projection, derive, batch_size, label):
+    cursor = mongo_client.col.find(query, projection, batch_size=batch_size)
+    stats = {"scanned": 0}
+
+    def updates():
+        for doc in cursor:
+            stats["scanned"] += 1
+            yield {"_id": doc["_id"], **derive(doc)}
+
+    stats.update(mongo_client.bulk_upsert(updates(), key=("_id",), chunk_size=batch_size, upsert=False))
+    logger.info(
+        f"{label} backfill: {stats['scanned']} posts scanned, {stats['modified']} updated, "
+        f"{stats['failed']} failed"
+    )
+    return stats
+
+
+def backfill_locations(mongo_client, batch_size=1000, force=False):
+    """Add the gazetteer location fields to posts stored before they were parsed at ingest."""
+    query = {} if force else {"location": {"$exists": False}}
+    return _backfill(
+        mongo_client, query, {"_id": 1, "address": 1},
+        lambda doc: {"location": location_fields(doc.get("address"))},
+        batch_size, "Location",
+    )
+
+
+def backfill_typed_fields(mongo_client, batch_size=1000, force=False):
+    """Add price_vnd, area_m2, bedrooms, price_per_m2, posted_at and expires_at to posts stored as raw strings only."""
+    query = {} if force else {"price_vnd": {"$exists": False}}
+    return _backfill(mongo_client, query, TYPED_SOURCE_FIELDS, typed_fields, batch_size, "Typed field")
+
+
+BACKFILLS = {"location": backfill_locations, "typed": backfill_typed_fields}
+
+
+if __name__ == "__main__":
+    from src.mongo_client import MongoDBClient
+
+    arg_parser = argparse.ArgumentParser(description="Backfill derived fields on posts already in MongoDB.")
+    arg_parser.add_argument("fields", nargs="*", choices=sorted(BACKFILLS), default=sorted(BACKFILLS))
+    arg_parser.add_argument("--batch-size", type=int, default=1000)
+    arg_parser.add_argument("--gazetteer", default=None, help="JSON gazetteer extending the built-in one")
+    arg_parser.add_argument("--force", action="store_true", help="recompute fields that are already set")
+    args = arg_parser.parse_args()
+
+    configure_gazetteer(args.gazetteer)
+    mongo = MongoDBClient()
+    try:
+        for name in args.fields:
+            BACKFILLS[name](mongo, args.batch_size, args.force)
+    finally:
+        mongo.close()
@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from src.utils import get_logger
+
+logger = get_logger("checkpoint")
+
+
+class CheckpointStore:
+    def __init__(self, path="data/checkpoints.json", max_page_attempts=3):
+        self.path = path
+        self.max_page_attempts = max_page_attempts
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint file {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._state, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, target_name):
+        with self._lock:
+            state = self._state.get(target_name)
+            return dict(state) if state else None
+
+    def save_pending(self, target_name, page, links):
+        with self._lock:
+            state = self._state.setdefault(target_name, {"last_page": None})
+            state["pending_page"] = page
+            state["pending"] = [list(link) for link in links]
+            state["updated_at"] = datetime.now().isoformat()
+            self._save()
+
+    def mark_page_done(self, target_name, page):
+        with self._lock:
+            state = self._state.setdefault(target_name, {})
+            # Retried pages complete out of order; never move progress backwards.
+            state["last_page"] = max(state.get("last_page") or 0, page)
+            if page in state.get("failed_pages", []):
+                state["failed_pages"].remove(page)
+            state.get("failed_attempts", {}).pop(str(page), None)
+            state["pending_page"] = None
+            state["pending"] = []
+            state["updated_at"] = datetime.now().isoformat()
+            self._save()
+
+    def mark_page_failed(self, target_name, page):
+        """Record a failed load; returns False once the page has used up its attempts."""
+        with self._lock:
+            state = self._state.setdefault(target_name, {"last_page": None})
+            failed = state.setdefault("failed_pages", [])
+            attempts = state.setdefault("failed_attempts", {})
+            attempts[str(page)] = attempts.get(str(page), 0) + 1
+            retry = attempts[str(page)] < self.max_page_attempts
+            if retry and page not in failed:
+                failed.append(page)
+            elif not retry:
+                if page in failed:
+                    failed.remove(page)
+                del attempts[str(page)]
+                logger.warning(f"Giving up on page {page} of {target_name} after {self.max_page_attempts} attempts")
+            state["updated_at"] = datetime.now().isoformat()
+            self._save()
+            return retry
+
+    def finish_walk(self, target_name):
+        """The page range has been walked: the next run starts a fresh crawl.
+
+        Pages that failed keep their attempt counts so a page that never loads
+        is eventually dropped instead of pinning the checkpoint forever.
+        """
+        with self._lock:
+            state = self._state.get(target_name)
+            if state is None:
+                return
+            if not state.get("failed_pages"):
+                del self._state[target_name]
+            else:
+                state["last_page"] = None
+                state["pending_page"] = None
+                state["pending"] = []
+                state["updated_at"] = datetime.now().isoformat()
+            self._save()
+
+    def clear(self, target_name):
+        with self._lock:
+            if self._state.pop(target_name, None) is not None:
+                self._save()
@@ -0,0 +1,101 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.cleaner import iter_cleaned
+from src.utils import get_logger, open_text
+
+logger = get_logger("clean_batch")
+
+RAW_SUFFIXES = (".json", ".jsonl", ".json.gz", ".jsonl.gz", ".json.zst", ".jsonl.zst")
+
+
+def expand_inputs(inputs):
+    """Resolve directories and glob patterns to a sorted list of raw dump files."""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for name in os.listdir(item):
+                if name.endswith(RAW_SUFFIXES):
+                    paths.add(os.path.join(item, name))
+        else:
+            paths.update(path for path in glob.glob(item) if os.path.isfile(path))
+    return sorted(paths)
+
+
+def post_key(item):
+    return str(item.get("post_id")), item.get("transaction_type")
+
+
+def keep_latest(latest, item):
+    # Later scrapes win; on equal timestamps the record seen last (later file) wins.
+    key = post_key(item)
+    current = latest.get(key)
+    if current is None or (item.get("scraped_at") or "") >= (current.get("scraped_at") or ""):
+        latest[key] = item
+
+
+def _clean_file(args):
+    path, chunk_size = args
+    latest = {}
+    count = 0
+    try:
+        for chunk in iter_cleaned(path, chunk_size):
+            count += len(chunk)
+            for item in chunk:
+                keep_latest(latest, item)
+    except Exception as e:
+        return path, count, list(latest.values()), str(e)
+    return path, count, list(latest.values()), None
+
+
+def clean_files(paths, output_file, workers=None, chunk_size=1000):
+    stats = {"files": len(paths), "errors": 0, "records": 0, "unique": 0, "duplicates": 0}
+    if not paths:
+        logger.info("No raw files to clean.")
+        return stats
+
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+    logger.info(f"Cleaning {len(paths)} files ({total_bytes / 1e6:.1f} MB) on {workers} processes...")
+    start = time.time()
+
+    latest = {}
+    jobs = ((path, chunk_size) for path in paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, count, items, error in pool.map(_clean_file, jobs):
+            if error:
+                stats["errors"] += 1
+                logger.warning(f"Failed to read {path} after {count} records: {error}")
+            stats["records"] += count
+            for item in items:
+                keep_latest(latest, item)
+
+    with open_text(output_file, "w") as out:
+        for item in latest.values():
+            out.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    stats["unique"] = len(latest)
+    stats["duplicates"] = stats["records"] - stats["unique"]
+    elapsed = max(time.time() - start, 1e-9)
+    logger.info(
+        f"Cleaned {stats['records']} records from {len(paths)} files in {elapsed:.1f}s "
+        f"({stats['records'] / elapsed:.0f} records/s, {total_bytes / 1e6 / elapsed:.1f} MB/s): "
+        f"{stats['unique']} unique posts written to {output_file}, {stats['duplicates']} duplicates dropped, "
+        f"{stats['errors']} files with errors"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Clean raw dumps in parallel and merge them into one JSONL file.")
+    arg_parser.add_argument("inputs", nargs="*", default=["data/raw"], help="directories or glob patterns")
+    arg_parser.add_argument("--output", default="data/clean/posts_clean.jsonl")
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--chunk-size", type=int, default=1000)
+    args = arg_parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    clean_files(expand_inputs(args.inputs), args.output, args.workers, args.chunk_size)
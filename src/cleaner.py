@@ -1,6 +1,18 @@
+import codecs
 import json
 import re
 import os
+import zlib
+from datetime import datetime
+from src.gazetteer import normalize_address
+from src.utils import get_logger, open_text
+
+try:
+    from zstandard import ZstdError
+except ImportError:
+    ZstdError = OSError
+
+logger = get_logger("cleaner")
 
 # --- 1. CÁC HÀM HỖ TRỢ LÀM SẠCH DỮ LIỆU (Dùng chung) ---
 
@@ -43,6 +55,15 @@ def clean_date(text):
     return text
 
 def clean_address(addr_str):
+    """Tách địa chỉ theo gazetteer; chỉ quay về cách tách theo vị trí khi không nhận ra tỉnh/thành."""
+    location = normalize_address(addr_str)
+    if location["province"]:
+        return {
+            "City": location["province"],
+            "District": location["district"] or "",
+            "Ward": location["ward"] or "",
+            "Street": location["street"] or "",
+        }
     parts = [p.strip() for p in addr_str.split(',')]
     addr_obj = {"City": "", "District": "", "Ward": "", "Street": ""}
     if len(parts) >= 1: addr_obj["City"] = parts[-1]
@@ -103,34 +124,136 @@ def process_sale_item(item):
         
     return cleaned
 
-# --- 4. HÀM ĐIỀU PHỐI CHÍNH ---
+# --- 4. ĐỌC DỮ LIỆU THÔ DẠNG STREAM ---
+
+READ_SIZE = 1 << 18
+_decoder = json.JSONDecoder()
+# Khoảng trắng, dấu phẩy và ngoặc vuông giữa các record (JSON array, JSONL, object nối liền)
+_SEPARATORS = re.compile(r"[\s,\[\]]*")
+
+def _read(f, decoder, read_size, input_file):
+    # read1 trên buffer nhị phân: trả về phần đã giải nén trước khi gặp lỗi, không như TextIOWrapper.read
+    # File .gz/.zst ghi dở khi crash không có trailer: coi như hết file
+    try:
+        data = f.buffer.read1(read_size)
+    except (EOFError, OSError, ZstdError, zlib.error) as e:
+        logger.warning(f"{input_file}: compressed stream ends early ({e}); reading stops here")
+        data = b""
+    return decoder.decode(data, final=not data)
+
+def _record_start(buf, pos):
+    # Record tiếp theo mở bằng "{" ở đầu dòng, cùng mức thụt lề với record hỏng
+    # (JSONL: cột 0; JSON array indent=4: 4 dấu cách), nên không nhảy vào object lồng bên trong
+    indent = buf[buf.rfind("\n", 0, pos) + 1:pos]
+    if indent.strip(): indent = ""
+    return re.compile("\n" + re.escape(indent) + "{")
+
+def iter_raw_records(input_file, read_size=READ_SIZE):
+    """Đọc lần lượt từng record (dict), không nạp cả file vào bộ nhớ.
+    Hỗ trợ JSON array (kể cả dạng indent), JSONL và các object nối liền nhau (kể cả file .gz/.zst).
+    Record hỏng / bị cắt ngang (file ghi dở khi crash) được log và bỏ qua tới record kế tiếp."""
+    with open_text(input_file) as f:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        buf, pos, eof = "", 0, False
+        skip = None
+        while True:
+            if skip is not None:
+                match = skip.search(buf, pos)
+                if match:
+                    pos, skip = match.end() - 1, None
+                    continue
+                if eof: return
+                # Chỉ giữ dòng cuối (có thể là nửa đầu của "\n    {"), bộ nhớ không tăng khi bỏ qua
+                chunk = _read(f, decoder, read_size, input_file)
+                eof = not chunk
+                buf, pos = buf[max(buf.rfind("\n", pos), pos):] + chunk, 0
+                continue
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos == len(buf):
+                if eof: return
+                buf, pos = _read(f, decoder, read_size, input_file), 0
+                eof = not buf
+                continue
+            try:
+                record, pos = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if not eof and buf.find("\n", e.pos) < 0:
+                    # Lỗi nằm ở dòng cuối của buffer: record bị cắt ngang, đọc thêm rồi decode lại
+                    chunk = _read(f, decoder, read_size, input_file)
+                    eof = not chunk
+                    buf, pos = buf[pos:] + chunk, 0
+                    continue
+                # Sau chỗ lỗi vẫn còn dòng mới (hoặc đã hết file): record hỏng, bỏ ngay tới record kế tiếp
+                # thay vì đọc thêm, để một record hỏng không kéo phần còn lại của file vào buffer
+                logger.warning(f"{input_file}: skipping broken record ({e.msg}): {buf[pos:pos + 80]!r}")
+                skip = _record_start(buf, pos)
+                pos += 1
+                continue
+            if isinstance(record, dict):
+                yield record
+            else:
+                logger.warning(f"{input_file}: skipping non-object value {str(record)[:80]!r}")
+
+def iter_chunks(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+# --- 5. HÀM ĐIỀU PHỐI CHÍNH ---
+
+def clean_record(item):
+    # Tự động nhận diện loại giao dịch để gọi hàm tương ứng
+    trans_type = item.get("transaction_type", "").lower()
+    if "rent" in trans_type or "thue" in trans_type:
+        return process_rent_item(item)
+    # Mặc định xử lý như tin bán (sale)
+    return process_sale_item(item)
+
+def to_datetime(text):
+    try:
+        return datetime.strptime(text, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+def typed_fields(item):
+    """Các trường số / ngày đã chuẩn hoá, lưu cạnh chuỗi gốc để query theo khoảng giá trị có index"""
+    cleaned = clean_record(item)
+    spec = cleaned.get("spec") if isinstance(cleaned.get("spec"), dict) else {}
+    return {
+        "price_vnd": cleaned.get("price_total", cleaned.get("price_monthly")),
+        "area_m2": cleaned.get("area"),
+        "bedrooms": spec.get("bedroom"),
+        "price_per_m2": cleaned.get("price_per_m2", cleaned.get("rent_per_m2")),
+        "posted_at": to_datetime(cleaned.get("date_posted")),
+        "expires_at": to_datetime(cleaned.get("date_expired")),
+    }
+
+def iter_cleaned(input_file, chunk_size=1000):
+    """Sinh ra từng chunk record đã làm sạch; bộ nhớ chỉ phụ thuộc chunk_size."""
+    for chunk in iter_chunks(iter_raw_records(input_file), chunk_size):
+        yield [clean_record(item) for item in chunk]
+
+def stream_clean(input_file, output_file, chunk_size=1000):
+    """Làm sạch input_file và ghi ra output_file (JSONL, .gz/.zst theo đuôi file) theo từng chunk."""
+    count = 0
+    with open_text(output_file, "w") as out:
+        for chunk in iter_cleaned(input_file, chunk_size):
+            out.write("".join(json.dumps(item, ensure_ascii=False) + "\n" for item in chunk))
+            count += len(chunk)
+    return count
 
 def main_process(input_file):
     if not os.path.exists(input_file): return []
 
-    with open(input_file, 'r', encoding='utf-8') as f:
-        try:
-            # Sửa lỗi JSON nếu cần và load
-            content = f.read().strip()
-            fixed_content = re.sub(r'\}\s*\{', '}, {', content)
-            if not fixed_content.startswith('['): fixed_content = f"[{fixed_content}]"
-            data = json.loads(fixed_content)
-        except Exception as e:
-            print(f"Lỗi đọc file: {e}")
-            return []
-
-    final_results = []
-    for item in data:
-        # Tự động nhận diện loại giao dịch để gọi hàm tương ứng
-        trans_type = item.get("transaction_type", "").lower()
-        
-        if "rent" in trans_type or "thue" in trans_type:
-            final_results.append(process_rent_item(item))
-        else:
-            # Mặc định xử lý như tin bán (sale)
-            final_results.append(process_sale_item(item))
-            
-    return final_results
+    try:
+        return [item for chunk in iter_cleaned(input_file) for item in chunk]
+    except Exception as e:
+        print(f"Lỗi đọc file: {e}")
+        return []
 
 
 
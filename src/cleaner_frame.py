@@ -0,0 +1,263 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from src.cleaner import clean_address
+
+# Columnar version of process_sale_item/process_rent_item, for cleaning data
+# that is already in a DataFrame or Arrow table. Prices, integers and dates are
+# parsed by pyarrow.compute regex kernels over whole columns, with NumPy unit
+# multipliers; the patterns mirror clean_price, clean_int and clean_date in
+# src/cleaner.py and the benchmark suite checks the output against the
+# per-item cleaners. Arrow's regex engine (RE2) matches only ASCII digits for
+# \d, which is all batdongsan prints. Addresses go through the gazetteer once
+# per distinct value (a cached hash lookup).
+#
+# clean_frame is the fast path for data already in a frame. clean_records
+# returns the per-item dicts, and building those dicts costs about as much as
+# the per-item cleaners themselves, so the file pipelines stay per item.
+
+SPEC_INT_KEYS = ["bedroom", "bathroom", "num_floor", "front_width", "road_width"]
+
+ADDRESS_COLUMNS = {
+    "address_city": "City",
+    "address_district": "District",
+    "address_ward": "Ward",
+    "address_street": "Street",
+}
+SPEC_COLUMNS = {f"spec_{key}": key for key in SPEC_INT_KEYS}
+DERIVED_COLUMNS = (
+    list(ADDRESS_COLUMNS) + list(SPEC_COLUMNS)
+    + ["price_monthly", "rent_per_m2", "price_total", "price_per_m2", "legal_status"]
+)
+
+NUMBER_PATTERN = r"(?P<number>[\d.,]+)"
+# What float() accepts once "," became ".": anything else makes the scalar cleaners return None.
+FLOAT_PATTERN = r"^(?:\d+\.?\d*|\.\d+)$"
+DATE_PATTERN = r"(?P<d>\d{1,2})/(?P<m>\d{1,2})/(?P<y>\d{4})"
+PRICE_UNITS = [("tỷ", 1_000_000_000.0), ("triệu", 1_000_000.0), ("nghìn|ngàn", 1_000.0)]
+INT64_LIMIT = 2.0 ** 63
+
+
+def map_unique(series, func):
+    """func(value) for every row, calling func once per distinct value. Missing cells get func(None)."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    results = np.empty(len(uniques) + 1, dtype=object)
+    results[:-1] = [func(value) for value in uniques]
+    if (codes < 0).any():
+        results[-1] = func(None)
+    # Code -1 (missing) picks the trailing func(None) slot.
+    return pd.Series(results[codes], index=series.index, dtype=object)
+
+
+def _column(frame, name):
+    if name in frame.columns:
+        return frame[name].astype(object)
+    return pd.Series(None, index=frame.index, dtype=object)
+
+
+def _present(series):
+    """Rows the scalar cleaners see as truthy text; a NaN cell is a key missing from the post."""
+    return (series.notna() & (series != "")).to_numpy(dtype=bool)
+
+
+def _texts(series):
+    """Mask of truthy cells and their str() as an Arrow string array."""
+    present = _present(series)
+    values = series.to_numpy()[present]
+    try:
+        return present, pa.array(values, type=pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Numbers or other objects in a text column: the scalar cleaners call str() on them.
+        return present, pa.array([str(value) for value in values], type=pa.string())
+
+
+def _mask(array):
+    return array.fill_null(False).to_numpy(zero_copy_only=False)
+
+
+def _numbers(texts):
+    """First number of each text as float64, NaN where float() would have failed."""
+    number = pc.struct_field(pc.extract_regex(texts, NUMBER_PATTERN), [0])
+    number = pc.replace_substring(number, ",", ".")
+    valid = _mask(pc.match_substring_regex(number, FLOAT_PATTERN))
+    values = np.full(len(texts), np.nan)
+    # Arrow's string -> float64 cast is correctly rounded, like float().
+    values[valid] = pc.cast(number.filter(pa.array(valid)), pa.float64()).to_numpy()
+    return values
+
+
+def _scatter(present, values, length):
+    out = np.full(length, np.nan)
+    out[present] = values
+    return out
+
+
+def parse_int(series):
+    """Vectorized clean_int: float64 values, NaN where clean_int returns None."""
+    present, texts = _texts(series)
+    return _scatter(present, _numbers(texts), len(series))
+
+
+def parse_price(series):
+    """Vectorized clean_price before int(): the number times its unit multiplier."""
+    present, texts = _texts(series)
+    lower = pc.utf8_lower(texts)
+    units = [_mask(pc.match_substring_regex(lower, unit)) for unit, _ in PRICE_UNITS]
+    multiplier = np.select(units, [factor for _, factor in PRICE_UNITS], 1.0)
+    return _scatter(present, _numbers(texts) * multiplier, len(series))
+
+
+def to_ints(values, index):
+    """int(value) for each float, as nullable Int64 (object ints beyond the int64 range)."""
+    finite = ~np.isnan(values)
+    if (np.abs(values[finite]) < INT64_LIMIT).all():
+        ints = np.zeros(len(values), dtype=np.int64)
+        ints[finite] = np.trunc(values[finite])
+        return pd.Series(pd.arrays.IntegerArray(ints, ~finite), index=index)
+    return pd.Series([int(value) if ok else None for value, ok in zip(values, finite)], index=index, dtype=object)
+
+
+def parse_date(series):
+    """Vectorized clean_date: "d/m/yyyy" -> "yyyy-mm-dd", other text unchanged, missing -> ""."""
+    present, texts = _texts(series)
+    parts = pc.extract_regex(texts, DATE_PATTERN)
+    matched = _mask(pc.is_valid(parts))
+    parts = parts.filter(pa.array(matched))
+    day, month, year = (pc.struct_field(parts, [i]) for i in range(3))
+    iso = pc.binary_join_element_wise(
+        year, pc.utf8_lpad(month, 2, "0"), pc.utf8_lpad(day, 2, "0"), "-"
+    )
+    out = series.copy()
+    out.iloc[~present] = ""
+    out.iloc[np.flatnonzero(present)[matched]] = iso.to_numpy(zero_copy_only=False)
+    return out
+
+
+def is_rent(frame):
+    trans_type = _column(frame, "transaction_type").fillna("").astype(str).str.lower()
+    return (trans_type.str.contains("rent", regex=False) | trans_type.str.contains("thue", regex=False)).to_numpy(dtype=bool)
+
+
+def _ratio(numerator, denominator, rows):
+    # Python round(): np.round is not correctly rounded.
+    result = np.full(len(numerator), None, dtype=object)
+    result[rows] = [round(x, 2) for x in (numerator[rows] / denominator[rows]).tolist()]
+    return result
+
+
+def clean_frame(frame):
+    """Clean a DataFrame (or pyarrow Table) of raw posts column by column.
+
+    Returns the input columns with area and dates cleaned, plus the flat
+    DERIVED_COLUMNS (address parts, spec integers, prices). The raw spec column
+    is left as is; frame_to_records() folds the spec_* columns back into it and
+    rebuilds the exact dicts the per-item cleaners return."""
+    if not isinstance(frame, pd.DataFrame):
+        frame = frame.to_pandas()
+    out = frame.copy()
+    index = frame.index
+    rent = is_rent(frame)
+
+    address = map_unique(_column(frame, "address").fillna(""), clean_address)
+    for name, key in ADDRESS_COLUMNS.items():
+        out[name] = pd.Series([parts[key] for parts in address], index=index, dtype=object)
+
+    area = np.trunc(parse_int(_column(frame, "area")))
+    out["area"] = to_ints(area, index)
+    out["date_posted"] = parse_date(_column(frame, "date_posted"))
+    out["date_expired"] = parse_date(_column(frame, "date_expired"))
+
+    spec = _column(frame, "spec")
+    # One pass over the spec dicts; keys a post lacks come out as NaN.
+    specs = pd.DataFrame([value if isinstance(value, dict) else {} for value in spec], index=index, dtype=object)
+    for name, key in SPEC_COLUMNS.items():
+        out[name] = to_ints(parse_int(_column(specs, key)), index)
+
+    price = np.trunc(parse_price(_column(frame, "price")))
+    # "if price and area": None and 0 are both falsy.
+    priced = (np.nan_to_num(price) != 0) & (np.nan_to_num(area) != 0)
+
+    ppp = _column(frame, "price_per_spm")
+    has_ppp = _present(ppp)
+    per_m2 = to_ints(np.trunc(parse_price(ppp)), index).astype(object).to_numpy().copy()
+    per_m2[pd.isna(per_m2)] = None
+    per_m2[~has_ppp] = None
+    computed = ~rent & ~has_ppp & priced
+    per_m2[computed] = _ratio(price, area, computed)[computed]
+
+    prices = to_ints(price, index)
+    out["price_monthly"] = prices.where(rent, None)
+    out["rent_per_m2"] = pd.Series(_ratio(price, area, rent & priced), index=index).astype("Float64")
+    out["price_total"] = prices.where(~rent, None)
+    out["price_per_m2"] = pd.Series(np.where(rent, None, per_m2), index=index, dtype=object)
+    legal = _column(specs, "legal")
+    out["legal_status"] = legal.where(~rent & legal.notna().to_numpy(), None)
+    return out
+
+
+def _native(value):
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def frame_to_records(cleaned, source, records=None):
+    """Rebuild the per-item cleaner output from clean_frame(source).
+
+    Pass the dicts source was built from as records to start each output from
+    a copy of its post, which is faster and keeps each post's own key order.
+    Otherwise a cell that is missing (NaN/None) in source counts as an absent
+    key, and keys follow source's column order."""
+    if not isinstance(source, pd.DataFrame):
+        source = source.to_pandas()
+    rent = is_rent(source)
+    has_ppp = _present(_column(source, "price_per_spm"))
+    spec = _column(source, "spec").tolist()
+
+    columns = list(source.columns)
+    present = {name: source[name].notna().to_numpy() for name in columns} if records is None else {}
+    needed = columns if records is None else ["area", "date_posted", "date_expired"]
+    values = {name: cleaned[name].astype(object).tolist() for name in needed + DERIVED_COLUMNS}
+    address = [(key, values[name]) for name, key in ADDRESS_COLUMNS.items()]
+    spec_values = [(key, values[name]) for name, key in SPEC_COLUMNS.items()]
+
+    results = []
+    for i in range(len(source)):
+        if records is not None:
+            item = records[i].copy()
+        else:
+            item = {name: values[name][i] for name in columns if present[name][i]}
+        item["address"] = {key: column[i] for key, column in address}
+        for name in ("area", "date_posted", "date_expired"):
+            item[name] = _native(values[name][i])
+        if isinstance(spec[i], dict):
+            new_spec = spec[i].copy()
+            for key, column in spec_values:
+                if key in new_spec:
+                    new_spec[key] = _native(column[i])
+            item["spec"] = new_spec
+
+        if rent[i]:
+            item["price_monthly"] = _native(values["price_monthly"][i])
+            rent_per_m2 = _native(values["rent_per_m2"][i])
+            if rent_per_m2 is not None:
+                item["rent_per_m2"] = rent_per_m2
+        else:
+            item["price_total"] = _native(values["price_total"][i])
+            price_per_m2 = _native(values["price_per_m2"][i])
+            if has_ppp[i] or price_per_m2 is not None:
+                item["price_per_m2"] = price_per_m2
+            if isinstance(spec[i], dict) and "legal" in spec[i]:
+                item["legal_status"] = spec[i]["legal"]
+        results.append(item)
+    return results
+
+
+def clean_records(records):
+    """Columnar equivalent of process_rent_item/process_sale_item over a list of posts."""
+    records = list(records)
+    frame = pd.DataFrame(records, dtype=object)
+    return frame_to_records(clean_frame(frame), frame, records)
@@ -0,0 +1,199 @@
+import argparse
+import os
+import uuid
+from datetime import date, datetime
+import pyarrow as pa
+import pyarrow.dataset as ds
+from src.cleaner import iter_chunks, iter_cleaned, iter_raw_records
+from src.utils import get_logger
+
+logger = get_logger("export_parquet")
+
+PARTITION_FIELDS = [
+    ("transaction_type", pa.string()),
+    ("scrape_date", pa.string()),
+]
+PARTITION_SCHEMA = pa.schema(PARTITION_FIELDS)
+SPEC_INT_KEYS = ["bedroom", "bathroom", "num_floor", "front_width", "road_width"]
+
+SCHEMA = pa.schema([
+    ("post_id", pa.string()),
+    ("property_url", pa.string()),
+    ("property_category", pa.string()),
+    ("title", pa.string()),
+    ("address_city", pa.string()),
+    ("address_district", pa.string()),
+    ("address_ward", pa.string()),
+    ("address_street", pa.string()),
+    ("province_code", pa.string()),
+    ("district_code", pa.string()),
+    ("ward_key", pa.string()),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    ("price_total", pa.int64()),
+    ("price_monthly", pa.int64()),
+    ("price_per_m2", pa.float64()),
+    ("rent_per_m2", pa.float64()),
+    ("area", pa.int64()),
+] + [(key, pa.int64()) for key in SPEC_INT_KEYS] + [
+    ("legal_status", pa.string()),
+    ("project_name", pa.string()),
+    ("news_type", pa.string()),
+    ("verified_status", pa.string()),
+    ("date_posted", pa.date32()),
+    ("date_expired", pa.date32()),
+    ("scraped_at", pa.timestamp("us")),
+    ("images", pa.list_(pa.string())),
+    ("description", pa.string()),
+] + PARTITION_FIELDS)
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _number(value, kind):
+    # The cleaner leaves unparsable values as None; anything else must fit the column type.
+    return kind(value) if isinstance(value, (int, float)) else None
+
+
+def to_row(item):
+    """Flatten one cleaned record (process_sale_item/process_rent_item output) to the export schema."""
+    address = item.get("address") if isinstance(item.get("address"), dict) else {}
+    spec = item.get("spec") if isinstance(item.get("spec"), dict) else {}
+    project = item.get("project_info") if isinstance(item.get("project_info"), dict) else {}
+    location = item.get("location") if isinstance(item.get("location"), dict) else {}
+    scraped_at = _timestamp(item.get("scraped_at"))
+    row = {
+        "post_id": str(item["post_id"]) if item.get("post_id") is not None else None,
+        "property_url": item.get("property_url"),
+        "property_category": item.get("property_category"),
+        "title": item.get("title"),
+        "address_city": address.get("City") or None,
+        "address_district": address.get("District") or None,
+        "address_ward": address.get("Ward") or None,
+        "address_street": address.get("Street") or None,
+        "province_code": location.get("province_code"),
+        "district_code": location.get("district_code"),
+        "ward_key": location.get("ward_key"),
+        "latitude": _number(item.get("latitude"), float),
+        "longitude": _number(item.get("longitude"), float),
+        "price_total": _number(item.get("price_total"), int),
+        "price_monthly": _number(item.get("price_monthly"), int),
+        "price_per_m2": _number(item.get("price_per_m2"), float),
+        "rent_per_m2": _number(item.get("rent_per_m2"), float),
+        "area": _number(item.get("area"), int),
+        "legal_status": spec.get("legal"),
+        "project_name": project.get("name"),
+        "news_type": item.get("news_type"),
+        "verified_status": item.get("verified_status"),
+        "date_posted": _date(item.get("date_posted")),
+        "date_expired": _date(item.get("date_expired")),
+        "scraped_at": scraped_at,
+        "images": item.get("images") if isinstance(item.get("images"), list) else None,
+        "description": item.get("description"),
+        "transaction_type": item.get("transaction_type"),
+        "scrape_date": scraped_at.date().isoformat() if scraped_at else None,
+    }
+    for key in SPEC_INT_KEYS:
+        row[key] = _number(spec.get(key), int)
+    return row
+
+
+def _key(row):
+    return row["post_id"], row["transaction_type"], row["scraped_at"]
+
+
+def exported_keys(root, scrape_dates):
+    """(post_id, transaction_type, scraped_at) of rows already exported for the given scrape dates."""
+    dataset = open_dataset(root)
+    if not dataset.files or not scrape_dates:
+        return set()
+    # Partition pruning: only the touched scrape_date directories are read, and only the key columns.
+    table = dataset.to_table(
+        columns=["post_id", "transaction_type", "scraped_at"],
+        filter=ds.field("scrape_date").isin(sorted(scrape_dates)),
+    )
+    return set(zip(*(table[name].to_pylist() for name in table.column_names)))
+
+
+def export_parquet(records, root="data/parquet", batch_size=100_000, incremental=True):
+    """Append cleaned records to a Parquet dataset partitioned by transaction_type/scrape_date.
+
+    Each call writes new files; existing ones are never rewritten. With
+    incremental=True a record is skipped when the same post with the same
+    scraped_at is already in the dataset, so re-running over the same input
+    appends nothing while newer scrapes of a post are still added."""
+    os.makedirs(root, exist_ok=True)
+    run_id = uuid.uuid4().hex[:12]
+    stats = {"written": 0, "skipped": 0, "files": 0}
+
+    for batch_no, items in enumerate(iter_chunks(records, batch_size)):
+        rows = [to_row(item) for item in items]
+        if incremental:
+            seen = exported_keys(root, {row["scrape_date"] for row in rows if row["scrape_date"]})
+            fresh = []
+            for row in rows:
+                key = _key(row)
+                if row["scraped_at"] is not None and key in seen:
+                    continue
+                seen.add(key)
+                fresh.append(row)
+            stats["skipped"] += len(rows) - len(fresh)
+            rows = fresh
+        if not rows:
+            continue
+
+        table = pa.Table.from_pylist(rows, schema=SCHEMA)
+        written = []
+        ds.write_dataset(
+            table,
+            root,
+            format="parquet",
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+            basename_template=f"part-{run_id}-{batch_no}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_visitor=lambda written_file: written.append(written_file.path),
+        )
+        stats["written"] += table.num_rows
+        stats["files"] += len(written)
+
+    logger.info(
+        f"Exported {stats['written']} records to {root} in {stats['files']} files "
+        f"({stats['skipped']} already exported)"
+    )
+    return stats
+
+
+def open_dataset(root="data/parquet"):
+    """Open the export for scanning, e.g. open_dataset().to_table(filter=ds.field("transaction_type") == "sale")."""
+    return ds.dataset(root, format="parquet", partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Export cleaned listings to a partitioned Parquet dataset.")
+    arg_parser.add_argument("inputs", nargs="+", help="cleaned JSONL files (or raw dumps with --raw)")
+    arg_parser.add_argument("--root", default="data/parquet")
+    arg_parser.add_argument("--raw", action="store_true", help="inputs are raw dumps; clean them first")
+    arg_parser.add_argument("--no-dedupe", action="store_true", help="append without checking what is already exported")
+    args = arg_parser.parse_args()
+
+    def read_inputs():
+        for path in args.inputs:
+            if args.raw:
+                for chunk in iter_cleaned(path):
+                    yield from chunk
+            else:
+                yield from iter_raw_records(path)
+
+    export_parquet(read_inputs(), args.root, incremental=not args.no_dedupe)
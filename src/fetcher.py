@@ -0,0 +1,128 @@
+import asyncio
+import re
+import httpx
+from src.utils import get_logger
+
+logger = get_logger("fetcher")
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "vi-VN,vi;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+DETAIL_TITLE_PATTERN = re.compile(
+    r'<h1[^>]*class\s*=\s*["\'][^"\']*\bre__pr-title\b', re.IGNORECASE
+)
+
+CHALLENGE_MARKERS = (
+    "cf-challenge",
+    "cf-chl-",
+    "challenge-platform",
+    "just a moment...",
+    "attention required",
+    "g-recaptcha",
+    "h-captcha",
+)
+
+CHALLENGE_STATUS_CODES = {403, 429, 503}
+
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def looks_like_challenge(status_code, html):
+    if status_code in CHALLENGE_STATUS_CODES:
+        return True
+    head = html[:20000].lower()
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+def needs_browser(status_code, html):
+    if not html or status_code != 200:
+        return True
+    if looks_like_challenge(status_code, html):
+        return True
+    return DETAIL_TITLE_PATTERN.search(html) is None
+
+
+class HttpFetcher:
+    def __init__(self, concurrency=8, timeout=20, headers=None, limiter=None):
+        self.concurrency = max(1, concurrency)
+        self.limiter = limiter
+        self.timeout = timeout
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._loop = asyncio.new_event_loop()
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+                keepalive_expiry=30,
+            )
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def _fetch_one(self, client, semaphore, url):
+        async with semaphore:
+            if self.limiter is not None:
+                await asyncio.sleep(self.limiter.reserve(url))
+            try:
+                response = await client.get(url)
+                html = response.text
+                self._report(url, response.status_code, html)
+                if needs_browser(response.status_code, html):
+                    logger.info(f"HTTP fetch fell back to browser ({response.status_code}): {url}")
+                    return url, None
+                return url, html
+
+            except httpx.TimeoutException as e:
+                logger.warning(f"HTTP fetch timed out for {url}: {e}")
+                if self.limiter is not None:
+                    self.limiter.on_throttle(url, "timeout")
+                return url, None
+
+            except httpx.HTTPError as e:
+                logger.warning(f"HTTP fetch failed for {url}: {e}")
+                return url, None
+
+    def _report(self, url, status_code, html):
+        if self.limiter is None:
+            return
+        if status_code in THROTTLE_STATUS_CODES:
+            self.limiter.on_throttle(url, f"HTTP {status_code}")
+        elif looks_like_challenge(status_code, html):
+            self.limiter.on_throttle(url, "challenge page")
+        else:
+            self.limiter.on_success(url)
+
+    async def _fetch_all(self, urls):
+        client = self._get_client()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [self._fetch_one(client, semaphore, url) for url in urls]
+        return dict(await asyncio.gather(*tasks))
+
+    def fetch_many(self, urls):
+        if not urls:
+            return {}
+        return self._loop.run_until_complete(self._fetch_all(urls))
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        if self._client is not None:
+            self._loop.run_until_complete(self._client.aclose())
+            self._client = None
+        self._loop.close()
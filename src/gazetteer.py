@@ -0,0 +1,367 @@
+import json
+import re
+import unidecode
+from functools import lru_cache
+
+# Administrative units with their GSO codes (danh mục hành chính, before the 2025 merge).
+# The built-in table covers every province and the districts of the four largest cities;
+# configure_gazetteer(path) extends it from a JSON export with the same shape, wards included.
+PROVINCES = [
+    ("01", "Hà Nội", ["hn", "ha noi"]),
+    ("02", "Hà Giang", []),
+    ("04", "Cao Bằng", []),
+    ("06", "Bắc Kạn", ["bac can"]),
+    ("08", "Tuyên Quang", []),
+    ("10", "Lào Cai", []),
+    ("11", "Điện Biên", []),
+    ("12", "Lai Châu", []),
+    ("14", "Sơn La", []),
+    ("15", "Yên Bái", []),
+    ("17", "Hòa Bình", []),
+    ("19", "Thái Nguyên", []),
+    ("20", "Lạng Sơn", []),
+    ("22", "Quảng Ninh", []),
+    ("24", "Bắc Giang", []),
+    ("25", "Phú Thọ", []),
+    ("26", "Vĩnh Phúc", []),
+    ("27", "Bắc Ninh", []),
+    ("30", "Hải Dương", []),
+    ("31", "Hải Phòng", []),
+    ("33", "Hưng Yên", []),
+    ("34", "Thái Bình", []),
+    ("35", "Hà Nam", []),
+    ("36", "Nam Định", []),
+    ("37", "Ninh Bình", []),
+    ("38", "Thanh Hóa", []),
+    ("40", "Nghệ An", []),
+    ("42", "Hà Tĩnh", []),
+    ("44", "Quảng Bình", []),
+    ("45", "Quảng Trị", []),
+    ("46", "Thừa Thiên Huế", ["hue", "thua thien hue"]),
+    ("48", "Đà Nẵng", []),
+    ("49", "Quảng Nam", []),
+    ("51", "Quảng Ngãi", []),
+    ("52", "Bình Định", []),
+    ("54", "Phú Yên", []),
+    ("56", "Khánh Hòa", []),
+    ("58", "Ninh Thuận", []),
+    ("60", "Bình Thuận", []),
+    ("62", "Kon Tum", []),
+    ("64", "Gia Lai", []),
+    ("66", "Đắk Lắk", ["dac lac"]),
+    ("67", "Đắk Nông", ["dac nong"]),
+    ("68", "Lâm Đồng", []),
+    ("70", "Bình Phước", []),
+    ("72", "Tây Ninh", []),
+    ("74", "Bình Dương", []),
+    ("75", "Đồng Nai", []),
+    ("77", "Bà Rịa - Vũng Tàu", ["vung tau", "ba ria vung tau", "brvt"]),
+    ("79", "Hồ Chí Minh", ["hcm", "tphcm", "tp hcm", "sai gon", "ho chi minh"]),
+    ("80", "Long An", []),
+    ("82", "Tiền Giang", []),
+    ("83", "Bến Tre", []),
+    ("84", "Trà Vinh", []),
+    ("86", "Vĩnh Long", []),
+    ("87", "Đồng Tháp", []),
+    ("89", "An Giang", []),
+    ("91", "Kiên Giang", []),
+    ("92", "Cần Thơ", []),
+    ("93", "Hậu Giang", []),
+    ("94", "Sóc Trăng", []),
+    ("95", "Bạc Liêu", []),
+    ("96", "Cà Mau", []),
+]
+
+DISTRICTS = {
+    "01": [
+        ("001", "Ba Đình", []), ("002", "Hoàn Kiếm", []), ("003", "Tây Hồ", []),
+        ("004", "Long Biên", []), ("005", "Cầu Giấy", []), ("006", "Đống Đa", []),
+        ("007", "Hai Bà Trưng", []), ("008", "Hoàng Mai", []), ("009", "Thanh Xuân", []),
+        ("016", "Sóc Sơn", []), ("017", "Đông Anh", []), ("018", "Gia Lâm", []),
+        ("019", "Nam Từ Liêm", []), ("020", "Thanh Trì", []), ("021", "Bắc Từ Liêm", []),
+        ("250", "Mê Linh", []), ("268", "Hà Đông", []), ("269", "Sơn Tây", []),
+        ("271", "Ba Vì", []), ("272", "Phúc Thọ", []), ("273", "Đan Phượng", []),
+        ("274", "Hoài Đức", []), ("275", "Quốc Oai", []), ("276", "Thạch Thất", []),
+        ("277", "Chương Mỹ", []), ("278", "Thanh Oai", []), ("279", "Thường Tín", []),
+        ("280", "Phú Xuyên", []), ("281", "Ứng Hòa", []), ("282", "Mỹ Đức", []),
+    ],
+    "31": [
+        ("303", "Hồng Bàng", []), ("304", "Ngô Quyền", []), ("305", "Lê Chân", []),
+        ("306", "Hải An", []), ("307", "Kiến An", []), ("308", "Đồ Sơn", []),
+        ("309", "Dương Kinh", []), ("311", "Thủy Nguyên", []), ("312", "An Dương", []),
+        ("313", "An Lão", []), ("314", "Kiến Thụy", []), ("315", "Tiên Lãng", []),
+        ("316", "Vĩnh Bảo", []), ("317", "Cát Hải", []), ("318", "Bạch Long Vĩ", []),
+    ],
+    "48": [
+        ("490", "Liên Chiểu", []), ("491", "Thanh Khê", []), ("492", "Hải Châu", []),
+        ("493", "Sơn Trà", []), ("494", "Ngũ Hành Sơn", []), ("495", "Cẩm Lệ", []),
+        ("497", "Hòa Vang", []), ("498", "Hoàng Sa", []),
+    ],
+    "79": [
+        ("760", "Quận 1", []), ("761", "Quận 12", []), ("764", "Gò Vấp", []),
+        ("765", "Bình Thạnh", []), ("766", "Tân Bình", []), ("767", "Tân Phú", []),
+        ("768", "Phú Nhuận", []),
+        # Quận 2, Quận 9 and the old Thủ Đức district were merged into Thủ Đức city in 2021.
+        ("769", "Thủ Đức", ["2", "9"]),
+        ("770", "Quận 3", []), ("771", "Quận 10", []), ("772", "Quận 11", []),
+        ("773", "Quận 4", []), ("774", "Quận 5", []), ("775", "Quận 6", []),
+        ("776", "Quận 8", []), ("777", "Bình Tân", []), ("778", "Quận 7", []),
+        ("783", "Củ Chi", []), ("784", "Hóc Môn", []), ("785", "Bình Chánh", []),
+        ("786", "Nhà Bè", []), ("787", "Cần Giờ", []),
+    ],
+}
+
+# Only the first matching prefix is stripped, so check the longest ones first.
+ADMIN_PREFIXES = sorted(
+    ["thanh pho", "tp", "tinh", "quan", "huyen", "thi xa", "thi tran", "phuong", "xa"],
+    key=len, reverse=True,
+)
+WARD_PREFIXES = ("phuong ", "xa ", "thi tran ")
+DISTRICT_PREFIXES = ("quan ", "huyen ", "thi xa ", "thanh pho ", "tp ")
+PROJECT_PREFIX = "du an"
+STREET_PREFIXES = ("duong ", "pho ", "ngo ", "ngach ", "hem ", "kiet ", "so ")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_UNIT_SEPARATOR = re.compile(r"[\s.]+")
+
+
+@lru_cache(maxsize=8192)
+def ascii_key(text):
+    return _NON_ALNUM.sub(" ", unidecode.unidecode(text).lower()).strip()
+
+
+@lru_cache(maxsize=8192)
+def place_key(text):
+    """Accent-, case- and prefix-insensitive key: "TP. Hồ Chí Minh" -> "ho chi minh", "Quận 07" -> "7"."""
+    key = ascii_key(text)
+    for prefix in ADMIN_PREFIXES:
+        if key.startswith(prefix + " "):
+            key = key[len(prefix) + 1:]
+            break
+    return str(int(key)) if key.isdigit() else key
+
+
+class Gazetteer:
+    """Hash index over provinces, districts and wards, keyed by place_key()."""
+
+    def __init__(self):
+        self.provinces = {}
+        self.districts = {}
+        self.wards = {}
+        self._district_names = {}
+
+    def add_province(self, code, name, aliases=()):
+        entry = {"code": code, "name": name}
+        for key in {place_key(name), *aliases}:
+            self.provinces[key] = entry
+        return entry
+
+    def add_district(self, province_code, code, name, aliases=()):
+        entry = {"code": code, "name": name}
+        index = self.districts.setdefault(province_code, {})
+        for key in {place_key(name), *aliases}:
+            index[key] = entry
+            self._district_names.setdefault(key, []).append((province_code, entry))
+        return entry
+
+    def add_ward(self, district_code, code, name, aliases=()):
+        entry = {"code": code, "name": name}
+        index = self.wards.setdefault(district_code, {})
+        for key in {place_key(name), *aliases}:
+            index[key] = entry
+        return entry
+
+    def province(self, name):
+        return self.provinces.get(place_key(name))
+
+    def district(self, name, province=None):
+        key = place_key(name)
+        if province is not None:
+            entry = self.province(province)
+            return self.districts.get(entry["code"], {}).get(key) if entry else None
+        matches = self._district_names.get(key, [])
+        return matches[0][1] if len(matches) == 1 else None
+
+    def _province_by_code(self, code):
+        for entry in self.provinces.values():
+            if entry["code"] == code:
+                return entry
+        return None
+
+    def normalize(self, address):
+        """Split a listing address into canonical units, matching from the most general part.
+
+        Returns a dict with province/district/ward names and GSO codes (None when
+        not found), district_key/ward_key (place_key of the name, also set for
+        units the gazetteer has no code for, e.g. "Huyện Long Thành" or the
+        unprefixed "Nhơn Trạch" before "Đồng Nai"), and the street and project
+        prefixes. District names are always in the table's form (see unit_name()),
+        whether or not the gazetteer knows them."""
+        parts = [part.strip() for part in (address or "").split(",") if part.strip()]
+        result = {
+            "province": None, "province_code": None,
+            "district": None, "district_code": None, "district_key": None,
+            "ward": None, "ward_code": None, "ward_key": None,
+            "street": None, "project": None,
+        }
+        end = len(parts)
+
+        province = None
+        for i in range(end - 1, -1, -1):
+            province = self.provinces.get(place_key(parts[i]))
+            if province:
+                end = i
+                break
+
+        district = None
+        district_index = self.districts.get(province["code"], {}) if province else {}
+        for i in range(end - 1, -1, -1):
+            if ascii_key(parts[i]).startswith(WARD_PREFIXES):
+                # "Phường 2" must not resolve to the district keyed "2".
+                continue
+            key = place_key(parts[i])
+            if province:
+                district = district_index.get(key)
+            else:
+                matches = self._district_names.get(key, [])
+                if len(matches) == 1:
+                    province = self._province_by_code(matches[0][0])
+                    district = matches[0][1]
+            if district:
+                end = i
+                break
+
+        if district:
+            result.update(district=district["name"], district_code=district["code"],
+                          district_key=place_key(district["name"]))
+        elif end > 0:
+            # No table entry: take a prefixed unit ("Huyện X", "Thị xã Y") by name, or
+            # else the part just before the province, as in "Xã A, Nhơn Trạch, Đồng Nai".
+            name = parts[end - 1]
+            if ascii_key(name).startswith(DISTRICT_PREFIXES) or (
+                    province and end == len(parts) - 1 and _positional_unit(name)):
+                name = unit_name(name)
+                result.update(district=name, district_key=place_key(name))
+                end -= 1
+
+        if end > 0:
+            key = place_key(parts[end - 1])
+            ward_index = self.wards.get(district["code"], {}) if district else {}
+            ward = ward_index.get(key)
+            if ward:
+                result.update(ward=ward["name"], ward_code=ward["code"], ward_key=place_key(ward["name"]))
+                end -= 1
+            elif ascii_key(parts[end - 1]).startswith(WARD_PREFIXES) or (
+                    result["district"] and not ward_index and _positional_unit(parts[end - 1])):
+                # Without a ward table for the district, the part before it is the ward,
+                # as in "Tân Phong, Quận 7, Hồ Chí Minh".
+                result.update(ward=parts[end - 1], ward_key=key)
+                end -= 1
+
+        rest = parts[:end]
+        projects = [part for part in rest if ascii_key(part).startswith(PROJECT_PREFIX + " ")]
+        streets = [part for part in rest if part not in projects]
+        if province:
+            result.update(province=province["name"], province_code=province["code"])
+        if projects:
+            result["project"] = projects[0][len("Dự án"):].strip()
+        if streets:
+            result["street"] = ", ".join(streets)
+        return result
+
+
+def unit_name(text):
+    """Unit name in the form the district tables use: "Huyện Long Thành" -> "Long Thành",
+    "TP. Thủ Dầu Một" -> "Thủ Dầu Một", numbered districts as "Quận 7"."""
+    key = place_key(text)
+    if key.isdigit():
+        return f"Quận {key}"
+    full = ascii_key(text)
+    prefix = full[:len(full) - len(key)].split()
+    return _UNIT_SEPARATOR.split(text.strip(), maxsplit=len(prefix))[-1] if prefix else text.strip()
+
+
+def _positional_unit(part):
+    """Whether an unmatched part can stand for an administrative unit by position alone."""
+    key = ascii_key(part)
+    return not (key.startswith(WARD_PREFIXES + STREET_PREFIXES) or key.startswith(PROJECT_PREFIX + " ")
+                or key[:1].isdigit())
+
+
+def build_gazetteer(data=None):
+    """Gazetteer from the built-in tables, extended with data from load_gazetteer_file()."""
+    gazetteer = Gazetteer()
+    for code, name, aliases in PROVINCES:
+        gazetteer.add_province(code, name, aliases)
+    for province_code, districts in DISTRICTS.items():
+        for code, name, aliases in districts:
+            gazetteer.add_district(province_code, code, name, aliases)
+
+    for province in (data or {}).get("provinces", []):
+        gazetteer.add_province(province["code"], province["name"], province.get("aliases", []))
+        for district in province.get("districts", []):
+            gazetteer.add_district(province["code"], district["code"], district["name"], district.get("aliases", []))
+            for ward in district.get("wards", []):
+                gazetteer.add_ward(district["code"], ward["code"], ward["name"], ward.get("aliases", []))
+    return gazetteer
+
+
+def load_gazetteer_file(path):
+    """Read {"provinces": [{"code", "name", "aliases"?, "districts": [{..., "wards": [...]}]}]}."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+_gazetteer = None
+
+
+def configure_gazetteer(path=None):
+    global _gazetteer
+    _gazetteer = build_gazetteer(load_gazetteer_file(path) if path else None)
+    _normalize_cached.cache_clear()
+    return _gazetteer
+
+
+def get_gazetteer():
+    if _gazetteer is None:
+        configure_gazetteer()
+    return _gazetteer
+
+
+@lru_cache(maxsize=65536)
+def _normalize_cached(address):
+    return get_gazetteer().normalize(address)
+
+
+def normalize_address(address):
+    return dict(_normalize_cached(address or ""))
+
+
+def location_filter(province=None, district=None, ward=None):
+    """MongoDB equality filter on the indexed location fields, from place names in any spelling.
+
+    Districts the gazetteer has no code for are matched by district_key within
+    their province, so they need the province as well."""
+    gazetteer = get_gazetteer()
+    query = {}
+    province_entry = None
+    if province:
+        province_entry = gazetteer.province(province)
+        if province_entry is None:
+            raise ValueError(f"Unknown province: {province}")
+        query["location.province_code"] = province_entry["code"]
+    if district:
+        district_entry = gazetteer.district(district, province)
+        if district_entry is not None:
+            query["location.district_code"] = district_entry["code"]
+        elif province_entry is not None:
+            query["location.district_key"] = place_key(district)
+        else:
+            raise ValueError(f"Unknown district: {district} (give its province to match it by name)")
+    if ward:
+        query["location.ward_key"] = place_key(ward)
+    return query
+
+
+def location_fields(address):
+    """Indexed location sub-document stored on each post (empty fields dropped)."""
+    return {key: value for key, value in normalize_address(address).items() if value is not None}
@@ -1,12 +1,100 @@
+import hashlib
+import json
 import os
-from pymongo import MongoClient, errors
+import time
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, MongoClient, UpdateOne, errors
 from dotenv import load_dotenv
+from src.cleaner import iter_chunks, typed_fields
+from src.gazetteer import location_filter
 from src.utils import get_logger
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Set, Tuple
 
 load_dotenv()
 logger = get_logger("mongodb")
 
+# Fields that change on every scrape (or are maintained by the upsert itself) and are not content.
+VOLATILE_FIELDS = {"_id", "scraped_at", "content_hash", "price_history"}
+HISTORY_FIELDS = ("price", "price_per_spm", "date_posted", "date_expired")
+
+# Every index the collection should have (default key-derived names); ensure_indexes() creates them.
+# search_query() only emits filters with an equality (or range) prefix on one of these.
+INDEXES = [
+    IndexModel([("post_id", ASCENDING), ("transaction_type", ASCENDING)], unique=True),
+    IndexModel([("transaction_type", ASCENDING), ("property_category", ASCENDING), ("price_vnd", ASCENDING)]),
+    IndexModel([("property_category", ASCENDING), ("posted_at", DESCENDING)]),
+    IndexModel([("transaction_type", ASCENDING), ("posted_at", DESCENDING)]),
+    IndexModel([("posted_at", DESCENDING)]),
+    IndexModel([
+        ("location.province_code", ASCENDING), ("location.district_key", ASCENDING), ("location.ward_key", ASCENDING)
+    ]),
+    IndexModel([("location.district_code", ASCENDING), ("location.ward_key", ASCENDING)]),
+    # MongoDB has no Vietnamese stemmer; "none" indexes the words as written (diacritic-insensitive).
+    IndexModel(
+        [("title", TEXT), ("project_info.name", TEXT)],
+        default_language="none", weights={"title": 1, "project_info.name": 3},
+    ),
+]
+
+
+def prepare_post(doc):
+    """Store the cleaner's typed values (price_vnd, area_m2, ...) next to the raw display strings."""
+    return {**doc, **typed_fields(doc)}
+
+
+def search_query(transaction_type=None, category=None, province=None, district=None, ward=None,
+                 text=None, min_price=None, max_price=None, posted_after=None):
+    """Build a listing filter that one of INDEXES can serve.
+
+    Location names go through the gazetteer (see location_filter); text is a
+    $text search over title and project name; prices are price_vnd bounds in
+    VND and need a transaction_type, since sale totals and monthly rents are
+    not comparable. Combinations without an indexed prefix raise ValueError
+    instead of silently scanning the collection."""
+    query = {}
+    if transaction_type:
+        query["transaction_type"] = transaction_type
+    if category:
+        query["property_category"] = category
+    if ward and not district:
+        raise ValueError("ward search needs a district")
+    query.update(location_filter(province, district, ward))
+    if text:
+        query["$text"] = {"$search": text}
+
+    price = {}
+    if min_price is not None:
+        price["$gte"] = min_price
+    if max_price is not None:
+        price["$lte"] = max_price
+    if price:
+        if not transaction_type:
+            raise ValueError("price range search needs a transaction_type")
+        query["price_vnd"] = price
+    if posted_after is not None:
+        query["posted_at"] = {"$gte": posted_after}
+
+    if not query:
+        raise ValueError("search_query needs at least one condition")
+    return query
+
+
+def plan_stages(plan):
+    """Stage names of an explain() plan tree, outermost first."""
+    if not isinstance(plan, dict):
+        return []
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan", "winningPlan"):
+        stages += plan_stages(plan.get(key))
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+
+def content_hash(doc):
+    content = {key: value for key, value in doc.items() if key not in VOLATILE_FIELDS}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
 
 class MongoDBClient:
     def __init__(self):
@@ -22,10 +110,8 @@ class MongoDBClient:
             self.client.server_info()
             self.db = self.client[db_name]
             self.col = self.db[col_name]
-            self.col.create_index(
-                [("post_id", 1), ("transaction_type", 1)],
-                unique=True
-            )
+            self.seen_index = None
+            self.ensure_indexes()
             logger.info(f"Connected to Atlas: DB [{db_name}] | Collection [{col_name}]")
 
         except Exception as e:
@@ -33,7 +119,52 @@ class MongoDBClient:
             raise
 
 
+    def ensure_indexes(self, drop_unmanaged=False):
+        """Create the INDEXES that are missing. With drop_unmanaged, also drop indexes not in INDEXES."""
+        managed = {model.document["name"] for model in INDEXES}
+        self.col.create_indexes(INDEXES)
+        if drop_unmanaged:
+            for name in set(self.col.index_information()) - managed - {"_id_"}:
+                self.col.drop_index(name)
+                logger.info(f"Dropped unmanaged index {name}")
+
+
+    def search_posts(self, fields=None, limit=0, **conditions) -> List[Dict[str, Any]]:
+        """fetch_posts over search_query(**conditions), e.g. search_posts(category="Apartment", district="Quận 7")."""
+        return self.fetch_posts(search_query(**conditions), fields, limit)
+
+
+    def query_plan(self, query) -> List[str]:
+        winning = self.col.find(query).explain().get("queryPlanner", {}).get("winningPlan", {})
+        return plan_stages(winning)
+
+
+    def check_query_plans(self, searches) -> Dict[str, List[str]]:
+        """Explain each search_query(**conditions); return the plans that fall back to COLLSCAN."""
+        failures = {}
+        for conditions in searches:
+            stages = self.query_plan(search_query(**conditions))
+            if "COLLSCAN" in stages:
+                failures[repr(conditions)] = stages
+        return failures
+
+
+    def attach_seen_index(self, seen_index):
+        if len(seen_index) == 0:
+            seen_index.bootstrap(self.col)
+        self.seen_index = seen_index
+
+
+    def _remember(self, docs):
+        if self.seen_index is not None:
+            self.seen_index.add_many(
+                (doc.get("post_id"), doc.get("transaction_type")) for doc in docs
+            )
+
+
     def check_duplicated(self, post_id, transaction_type):
+        if self.seen_index is not None and not self.seen_index.might_contain(str(post_id), transaction_type):
+            return False
         try:
             query = {"post_id": str(post_id), "transaction_type": transaction_type}
             result = self.col.find_one(query, {"_id": 1})
@@ -44,6 +175,66 @@ class MongoDBClient:
             return False
 
 
+    def _known_posts(self, keys, projection):
+        """Stored posts among (post_id, transaction_type) keys, with one $in query per transaction type.
+
+        Keys the seen index rules out are never queried."""
+        by_type = {}
+        for post_id, transaction_type in keys:
+            if not post_id:
+                continue
+            post_id = str(post_id)
+            if self.seen_index is None or self.seen_index.might_contain(post_id, transaction_type):
+                by_type.setdefault(transaction_type, set()).add(post_id)
+        docs = []
+        for transaction_type, post_ids in by_type.items():
+            query = {"post_id": {"$in": list(post_ids)}, "transaction_type": transaction_type}
+            docs.extend(self.col.find(query, {"_id": 0, "post_id": 1, "transaction_type": 1, **projection}))
+        return docs
+
+
+    def check_duplicated_many(self, keys) -> Set[Tuple[str, str]]:
+        """The (post_id, transaction_type) keys that are already stored.
+
+        Take the transaction type from each post's own URL: list pages mix
+        types and classify as "Unknown"."""
+        try:
+            return {(doc["post_id"], doc["transaction_type"]) for doc in self._known_posts(keys, {})}
+
+        except Exception as e:
+            logger.error(f"Bulk duplicate check error: {e}")
+            return set()
+
+
+    def get_fingerprints(self, keys) -> Dict[Tuple[str, str], Optional[str]]:
+        """check_duplicated_many, with each known post's list-card fingerprint (None if never stored)."""
+        try:
+            docs = self._known_posts(keys, {"list_fingerprint": 1})
+            return {(doc["post_id"], doc["transaction_type"]): doc.get("list_fingerprint") for doc in docs}
+
+        except Exception as e:
+            logger.error(f"Fingerprint lookup error: {e}")
+            return {}
+
+
+    def set_fingerprints(self, fingerprints: Dict[Tuple[str, str], str]) -> int:
+        if not fingerprints:
+            return 0
+        operations = [
+            UpdateOne(
+                {"post_id": post_id, "transaction_type": transaction_type},
+                {"$set": {"list_fingerprint": fingerprint}}
+            )
+            for (post_id, transaction_type), fingerprint in fingerprints.items()
+        ]
+        try:
+            return self.col.bulk_write(operations, ordered=False).modified_count
+
+        except Exception as e:
+            logger.error(f"Set fingerprints error: {e}")
+            return 0
+
+
     def find_post(self, query):
         try:
             result = self.col.find_one(query)
@@ -65,11 +256,14 @@ class MongoDBClient:
 
 
     def insert_post(self, data: dict):
+        data = prepare_post(data)
         try:
             result = self.col.insert_one(data)
+            self._remember([data])
             return result.inserted_id
 
         except errors.DuplicateKeyError:
+            self._remember([data])
             return None
 
         except Exception as e:
@@ -78,18 +272,224 @@ class MongoDBClient:
 
 
     def insert_many_posts(self, data_list: list) -> int:
+        return self.bulk_insert_posts(data_list)["inserted"]
+
+
+    def bulk_insert_posts(self, data_list: list) -> Dict[str, int]:
+        stats = {"inserted": 0, "duplicates": 0, "failed": 0, "duplicate_docs": []}
         if not data_list:
-            return 0
+            return stats
+        data_list = [prepare_post(doc) for doc in data_list]
         try:
             result = self.col.insert_many(data_list, ordered=False)
-            return len(result.inserted_ids)
+            self._remember(data_list)
+            stats["inserted"] = len(result.inserted_ids)
 
         except errors.BulkWriteError as bwe:
-            return bwe.details.get('nInserted', 0)
+            write_errors = bwe.details.get("writeErrors", [])
+            failed = {err.get("index") for err in write_errors if err.get("code") != 11000}
+            self._remember(doc for i, doc in enumerate(data_list) if i not in failed)
+            stats["inserted"] = bwe.details.get('nInserted', 0)
+            stats["duplicates"] = len(write_errors) - len(failed)
+            stats["failed"] = len(failed)
+            stats["duplicate_docs"] = [
+                data_list[err["index"]] for err in write_errors if err.get("code") == 11000
+            ]
 
         except Exception as e:
             logger.error(f"Bulk insert error: {e}")
-            return 0
+            stats["failed"] = len(data_list)
+
+        return stats
+
+
+    def bulk_upsert(
+            self,
+            records,
+            key=("post_id", "transaction_type"),
+            chunk_size: int = 1000,
+            max_retries: int = 3,
+            backoff: float = 0.5,
+            upsert: bool = True
+            ) -> Dict[str, int]:
+        """$set each record onto the document matching its key fields, in unordered bulk_write chunks.
+
+        records may be any iterable (a cursor, a generator); only one chunk is
+        held at a time. A chunk that hits a network error is resent after
+        backoff * 2**attempt seconds, up to max_retries times. The $set updates
+        are idempotent, so documents applied before the error count as
+        unchanged on the retry. Returns inserted (upserted), modified,
+        unchanged (matched but identical) and failed counts."""
+        stats = {"inserted": 0, "modified": 0, "unchanged": 0, "failed": 0}
+        for chunk in iter_chunks(records, chunk_size):
+            operations = []
+            for record in chunk:
+                # A null key would match (or upsert) one shared document for every key-less record.
+                if any(record.get(field) is None for field in key):
+                    stats["failed"] += 1
+                    continue
+                operations.append(UpdateOne(
+                    {field: record[field] for field in key},
+                    {"$set": {field: value for field, value in record.items() if field != "_id"}},
+                    upsert=upsert
+                ))
+            if len(operations) < len(chunk):
+                logger.warning(f"Bulk upsert: skipped {len(chunk) - len(operations)} records without {key}")
+            if not operations:
+                continue
+            result = self._write_chunk(operations, max_retries, backoff)
+            if result is None:
+                stats["failed"] += len(operations)
+                continue
+            failed = len(result.get("writeErrors", []))
+            stats["inserted"] += result.get("nUpserted", 0)
+            stats["modified"] += result.get("nModified", 0)
+            stats["unchanged"] += result.get("nMatched", 0) - result.get("nModified", 0)
+            stats["failed"] += failed
+            # Without upsert, records whose key matches nothing are neither written nor errors.
+            stats["failed"] += len(operations) - failed - result.get("nUpserted", 0) - result.get("nMatched", 0)
+        return stats
+
+
+    def _write_chunk(self, operations, max_retries, backoff):
+        for attempt in range(max_retries + 1):
+            try:
+                return self.col.bulk_write(operations, ordered=False).bulk_api_result
+
+            except errors.BulkWriteError as bwe:
+                write_errors = bwe.details.get("writeErrors", [])
+                if write_errors:
+                    logger.warning(f"Bulk upsert: {len(write_errors)} write errors, first: {write_errors[0].get('errmsg')}")
+                return bwe.details
+
+            except errors.ConnectionFailure as e:
+                if attempt == max_retries:
+                    logger.error(f"Bulk upsert failed after {max_retries} retries: {e}")
+                    return None
+                delay = backoff * 2 ** attempt
+                logger.warning(f"Bulk upsert network error, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+            except Exception as e:
+                logger.error(f"Bulk upsert error: {e}")
+                return None
+
+
+    def upsert_many_posts(self, data_list, chunk_size: int = 1000) -> Dict[str, int]:
+        """bulk_upsert posts by (post_id, transaction_type), adding typed fields and content_hash."""
+        def prepared():
+            for chunk in iter_chunks(data_list, chunk_size):
+                docs = []
+                for doc in chunk:
+                    # insert_many stamps _id on the docs it was given; bulk_upsert never $sets it.
+                    doc = prepare_post(doc)
+                    if doc.get("post_id") is not None:
+                        doc["post_id"] = str(doc["post_id"])
+                    doc["content_hash"] = content_hash(doc)
+                    docs.append(doc)
+                self._remember(docs)
+                yield from docs
+
+        return self.bulk_upsert(prepared(), chunk_size=chunk_size)
+
+
+    def _stored_docs(self, keys, projection):
+        by_type = {}
+        for post_id, transaction_type in keys:
+            by_type.setdefault(transaction_type, []).append(post_id)
+        stored = {}
+        for transaction_type, post_ids in by_type.items():
+            query = {"post_id": {"$in": post_ids}, "transaction_type": transaction_type}
+            for doc in self.col.find(query, projection):
+                stored[(doc["post_id"], doc.get("transaction_type"))] = doc
+        return stored
+
+
+    def _diff_update(self, new, old, history_limit):
+        update = {}
+        changed = {
+            key: value for key, value in new.items()
+            if key not in VOLATILE_FIELDS and old.get(key) != value
+        }
+        removed = {key: "" for key in old if key not in VOLATILE_FIELDS and key not in new}
+        changed["content_hash"] = new["content_hash"]
+        if "scraped_at" in new:
+            changed["scraped_at"] = new["scraped_at"]
+        update["$set"] = changed
+        if removed:
+            update["$unset"] = removed
+        if any(old.get(field) != new.get(field) for field in HISTORY_FIELDS) and history_limit > 0:
+            entry = {field: old.get(field) for field in HISTORY_FIELDS}
+            entry["seen_at"] = old.get("scraped_at")
+            entry["replaced_at"] = new.get("scraped_at")
+            update["$push"] = {"price_history": {"$each": [entry], "$slice": -history_limit}}
+        return update
+
+
+    def upsert_changed_posts(self, data_list: list, history_limit: int = 20) -> Dict[str, int]:
+        """Insert new posts and update changed ones with only the fields that differ.
+
+        Each stored post keeps a content_hash, so unchanged posts are recognised
+        from a hash-only lookup and cost no write. When price or dates change,
+        the previous values are pushed onto price_history, which is capped at
+        history_limit entries."""
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        if not data_list:
+            return stats
+
+        latest = {}
+        for doc in data_list:
+            doc = prepare_post({key: value for key, value in doc.items() if key != "_id"})
+            doc["post_id"] = str(doc["post_id"])
+            doc["content_hash"] = content_hash(doc)
+            latest[(doc["post_id"], doc.get("transaction_type"))] = doc
+        stats["unchanged"] = len(data_list) - len(latest)
+
+        try:
+            hashes = self._stored_docs(latest, {"_id": 0, "post_id": 1, "transaction_type": 1, "content_hash": 1})
+            changed = [key for key, doc in latest.items()
+                       if key in hashes and hashes[key].get("content_hash") != doc["content_hash"]]
+            stored = self._stored_docs(changed, {"_id": 0}) if changed else {}
+        except Exception as e:
+            logger.error(f"Stored post lookup error: {e}")
+            stats["failed"] = len(data_list)
+            return stats
+        # Already stored, whoever wrote them: list scans must see these as known.
+        self._remember(latest[key] for key in hashes)
+
+        operations = []
+        new_docs = []
+        for key, doc in latest.items():
+            selector = {"post_id": key[0], "transaction_type": key[1]}
+            if key not in hashes:
+                operations.append(UpdateOne(selector, {"$set": doc}, upsert=True))
+                new_docs.append((len(operations) - 1, doc))
+            elif key in stored:
+                operations.append(UpdateOne(selector, self._diff_update(doc, stored[key], history_limit)))
+            else:
+                stats["unchanged"] += 1
+
+        if not operations:
+            return stats
+        try:
+            result = self.col.bulk_write(operations, ordered=False)
+            self._remember(doc for _, doc in new_docs)
+            stats["inserted"] = result.upserted_count
+            stats["updated"] = result.modified_count
+
+        except errors.BulkWriteError as bwe:
+            write_errors = bwe.details.get("writeErrors", [])
+            failed_ops = {err.get("index") for err in write_errors}
+            self._remember(doc for index, doc in new_docs if index not in failed_ops)
+            stats["inserted"] = bwe.details.get("nUpserted", 0)
+            stats["updated"] = bwe.details.get("nModified", 0)
+            stats["failed"] = len(write_errors)
+
+        except Exception as e:
+            logger.error(f"Incremental upsert error: {e}")
+            stats["failed"] = len(operations)
+
+        return stats
 
 
     def update_post(self, query, update_data):
@@ -137,26 +537,65 @@ class MongoDBClient:
             limit: int = 0
             ) -> List[Dict[str, Any]]:
         try:
-            if query is None:
-                query = {}
-
-            if fields is None:
-                projection = {"_id": 0}
-            else:
-                projection = {field: 1 for field in fields}
-                projection["_id"] = 0
-
-            cursor = self.col.find(query, projection)
-            if limit > 0:
-                cursor = cursor.limit(limit)
-            return list(cursor)
+            return list(self.iter_posts(query, fields, limit=limit))
 
         except Exception as e:
             logger.error(f"Fetch posts error: {e}")
             return []
 
 
+    def iter_posts(
+            self,
+            query: Optional[Dict[str, Any]] = None,
+            fields: Optional[List[str]] = None,
+            batch_size: int = 1000,
+            limit: int = 0
+            ) -> Iterator[Dict[str, Any]]:
+        """Yield posts one at a time; the driver fetches batch_size documents per round trip.
+
+        fields is a server-side projection (dotted paths allowed), so long
+        descriptions and image lists never leave the server unless asked for.
+        Unlike fetch_posts, errors are raised: a silently truncated stream would
+        look like a complete export."""
+        if fields is None:
+            projection = {"_id": 0}
+        else:
+            projection = {field: 1 for field in fields}
+            projection["_id"] = 0
+
+        cursor = self.col.find(query or {}, projection, batch_size=batch_size)
+        if limit > 0:
+            cursor = cursor.limit(limit)
+        try:
+            yield from cursor
+        except Exception as e:
+            logger.error(f"Iterate posts error: {e}")
+            raise
+        finally:
+            cursor.close()
+
+
+    def iter_dataframes(
+            self,
+            query: Optional[Dict[str, Any]] = None,
+            fields: Optional[List[str]] = None,
+            chunk_rows: int = 10_000,
+            flatten: bool = True
+            ):
+        """Yield pandas DataFrames of at most chunk_rows posts, so only one chunk is in memory at a time.
+
+        With flatten, nested documents become dotted columns as with
+        pd.json_normalize (spec.bedroom, location.district_code, ...). Columns
+        follow the documents of each chunk; pd.concat aligns them if needed."""
+        import pandas as pd
+
+        for chunk in iter_chunks(self.iter_posts(query, fields, batch_size=min(chunk_rows, 10_000)), chunk_rows):
+            yield pd.json_normalize(chunk, sep=".") if flatten else pd.DataFrame(chunk)
+
+
     def close(self):
+        if getattr(self, 'seen_index', None) is not None:
+            self.seen_index.close()
         if hasattr(self, 'client'):
             self.client.close()
             logger.info("MongoDB connection closed.")
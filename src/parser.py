@@ -1,8 +1,13 @@
 from bs4 import BeautifulSoup
 import re
+import hashlib
 import unidecode
-from urllib.parse import urlparse
+from functools import lru_cache
+from lxml import html as lxml_html
+from lxml import etree
+from urllib.parse import urlparse, urljoin
 from datetime import datetime
+from src.gazetteer import location_fields
 
 SALE_PROPERTY_TYPES = {
     "ban-can-ho-chung-cu": "Apartment",
@@ -35,11 +40,16 @@ RENT_PROPERTY_TYPES = {
 }
 
 ALL_PROPERTY_TYPES = {**SALE_PROPERTY_TYPES, **RENT_PROPERTY_TYPES}
+MAX_PROPERTY_SLUG_LEN = max(len(slug) for slug in ALL_PROPERTY_TYPES)
 
 TRANSACTION_TYPE_PATTERNS = {
     "sale": r'^ban-',
     "rent": r'^cho-thue-'
 }
+TRANSACTION_TYPE_REGEXES = [
+    (transaction_type, re.compile(pattern))
+    for transaction_type, pattern in TRANSACTION_TYPE_PATTERNS.items()
+]
 
 SPEC_KEY_MAPPING = {
     "khoang_gia": "price",
@@ -61,13 +71,42 @@ SPEC_KEY_MAPPING = {
 }
 
 POST_ID_PATTERN = re.compile(r"pr(\d+)$")
+COORDINATE_PATTERNS = [
+    (key, re.compile(rf'["\']?{re.escape(key)}["\']?\s*:\s*(-?[\d\.]+)'))
+    for key in ('latitude', 'longitude')
+]
+KEY_SEPARATOR_PATTERN = re.compile(r'[\s,]+')
+KEY_INVALID_CHAR_PATTERN = re.compile(r'[^\w_]')
+KEY_REPEATED_UNDERSCORE_PATTERN = re.compile(r'_+')
 
 
+class MissingElementError(ValueError):
+    """A block every detail page has is missing: the layout changed or this is not a detail page."""
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+LIST_CARD_XPATH = etree.XPath(f"//div[{_has_class('js__card')}]")
+LIST_CARD_LINK_XPATH = etree.XPath("(.//a)[1]")
+LIST_CARD_FIELD_XPATHS = {
+    "title": etree.XPath(f"(.//*[{_has_class('re__card-title')} or {_has_class('js__card-title')}])[1]"),
+    "price": etree.XPath(f"(.//*[{_has_class('re__card-config-price')}])[1]"),
+    "area": etree.XPath(f"(.//*[{_has_class('re__card-config-area')}])[1]"),
+    "price_per_m2": etree.XPath(f"(.//*[{_has_class('re__card-config-price_per_m2')}])[1]"),
+    "location": etree.XPath(f"(.//*[{_has_class('re__card-location')}])[1]"),
+    "published": etree.XPath(f"(.//*[{_has_class('re__card-published-info-published-at')}])[1]"),
+}
+
+
+@lru_cache(maxsize=2048)
 def normalize_key(key):
+    # Labels come from a small fixed vocabulary, so the cache hit rate is ~100%.
     key = unidecode.unidecode(key).lower()
-    key = re.sub(r'[\s,]+', '_', key)
-    key = re.sub(r'[^\w_]', '', key)
-    key = re.sub(r'_+', '_', key)
+    key = KEY_SEPARATOR_PATTERN.sub('_', key)
+    key = KEY_INVALID_CHAR_PATTERN.sub('', key)
+    key = KEY_REPEATED_UNDERSCORE_PATTERN.sub('_', key)
     return key.strip('_')
 
 
@@ -103,33 +142,32 @@ def get_post_id(url):
 
 def classify_property_type(url):
     path = urlparse(url).path.strip('/').lower()
-    sorted_types = sorted(
-        ALL_PROPERTY_TYPES.items(),
-        key=lambda x: len(x[0]),
-        reverse=True
-    )
-    for path_segment, category in sorted_types:
-        if path.startswith(path_segment):
-            is_full_match = len(path) == len(path_segment)
-            if is_full_match or path[len(path_segment)] in ('-'):
-                return category
+    category = ALL_PROPERTY_TYPES.get(path)
+    if category:
+        return category
+
+    # Longest-prefix lookup: a slug matches when it is followed by '-' in the path.
+    end = path.rfind('-', 0, MAX_PROPERTY_SLUG_LEN + 1)
+    while end > 0:
+        category = ALL_PROPERTY_TYPES.get(path[:end])
+        if category:
+            return category
+        end = path.rfind('-', 0, end)
     return "Unknown"
 
 
 def classify_transaction_type(url):
     path = urlparse(url).path.strip('/').lower()
-    for transaction_type, pattern in TRANSACTION_TYPE_PATTERNS.items():
-        if re.match(pattern, path):
+    for transaction_type, pattern in TRANSACTION_TYPE_REGEXES:
+        if pattern.match(path):
             return transaction_type
     return "Unknown"
 
 
 def get_coordinate(html_content):
     geo = {}
-    keys = ['latitude', 'longitude']
-    for key in keys:
-        pattern = rf'["\']?{re.escape(key)}["\']?\s*:\s*(-?[\d\.]+)'
-        match = re.search(pattern, html_content)
+    for key, pattern in COORDINATE_PATTERNS:
+        match = pattern.search(html_content)
         if match:
             geo[key] = float(match.group(1).replace(' ', ''))
     return geo
@@ -162,6 +200,8 @@ def get_sub_info(soup):
 def get_agent_info(soup):
     agent_info = {}
     contact_box = soup.find("div", class_="re__ldp-contact-box")
+    if contact_box is None:
+        raise MissingElementError("contact box (div.re__ldp-contact-box) not found")
     agent_infor = contact_box.find("div", class_="re__agent-infor re__agent-name")
     if agent_infor:
         name_tag = (
@@ -242,6 +282,8 @@ def get_project_info(soup):
 def get_description(soup):
     prefix = "Thông tin mô tả"
     description_tag = soup.select_one(".re__pr-description")
+    if description_tag is None:
+        raise MissingElementError("description (.re__pr-description) not found")
     description = description_tag.get_text(strip=True)
     if description.startswith(prefix):
         description = description[len(prefix):].strip()
@@ -259,50 +301,116 @@ def get_images(soup):
     return images
 
 
-def parse_detail_page(html_content, url):
-    post_id = get_post_id(url)
+def _card_text(node):
+    text = " ".join(node.text_content().split())
+    return text or None
+
+
+FINGERPRINT_FIELDS = ("title", "price", "area", "published")
+
+
+def card_fingerprint(card):
+    parts = [" ".join((card.get(field) or "").split()).lower() for field in FINGERPRINT_FIELDS]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def parse_list_cards(html_content, page_url):
+    cards = []
+    root = lxml_html.fromstring(html_content)
+    for card in LIST_CARD_XPATH(root):
+        links = LIST_CARD_LINK_XPATH(card)
+        href = links[0].get("href") if links else None
+        if not href:
+            continue
+
+        url = urljoin(page_url, href)
+        item = {"url": url, "post_id": get_post_id(urlparse(url).path)}
+        for field, xpath in LIST_CARD_FIELD_XPATHS.items():
+            nodes = xpath(card)
+            if not nodes:
+                item[field] = None
+            elif field == "published":
+                item[field] = nodes[0].get("aria-label") or _card_text(nodes[0])
+            else:
+                item[field] = _card_text(nodes[0])
+        item["fingerprint"] = card_fingerprint(item)
+        cards.append(item)
+    return cards
+
+
+PARSER_BACKENDS = ("bs4", "lxml")
+_default_backend = "bs4"
+
+
+def set_default_backend(backend):
+    global _default_backend
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    _default_backend = backend
+
+
+def extract_fields(html_content):
     soup = BeautifulSoup(html_content, "lxml")
-    title = get_text(soup, "h1")
-    address = get_text(soup, "span.re__pr-short-description")
-    price_per_spm = get_text(soup, "span.ext")
-    description = get_description(soup)
-    images = get_images(soup)
+    return {
+        "title": get_text(soup, "h1"),
+        "address": get_text(soup, "span.re__pr-short-description"),
+        "price_per_spm": get_text(soup, "span.ext"),
+        "description": get_description(soup),
+        "images": get_images(soup),
+        "project_info": get_project_info(soup),
+        "agent_info": get_agent_info(soup),
+        "sub_info": get_sub_info(soup),
+        "specs": get_specs(soup),
+        "verified": soup.find("div", class_="re__pr-stick-listing-verified") is not None,
+    }
+
+
+def build_record(html_content, url, fields):
+    post_id = get_post_id(url)
     coords = get_coordinate(html_content)
-    project_info = get_project_info(soup)
-    agent_info = get_agent_info(soup)
-    sub_info = get_sub_info(soup)
-    specs = get_specs(soup)
+    specs = fields["specs"]
+    sub_info = fields["sub_info"]
 
     spec_data = {}
     for key, value in specs.items():
         mapped_key = SPEC_KEY_MAPPING.get(key, key)
         if mapped_key not in ['price', 'area']:
             spec_data[mapped_key] = value
-    verified_tag = soup.find("div", class_="re__pr-stick-listing-verified")
-    verified = "verified" if verified_tag else "unverified"
+    verified = "verified" if fields["verified"] else "unverified"
 
     data = {
         "post_id": post_id,
         "property_url": url,
         "transaction_type": classify_transaction_type(url),
         "property_category": classify_property_type(url),
-        "title": title,
-        "address": address,
+        "title": fields["title"],
+        "address": fields["address"],
+        "location": location_fields(fields["address"]),
         "latitude": coords.get('latitude'),
         "longitude": coords.get('longitude'),
         "price": specs.get("khoang_gia"),
-        "price_per_spm": price_per_spm,
+        "price_per_spm": fields["price_per_spm"],
         "area": specs.get("dien_tich"),
         "spec": spec_data,
-        "description": description,
-        "images": images,
-        "project_info": project_info,
+        "description": fields["description"],
+        "images": fields["images"],
+        "project_info": fields["project_info"],
         "date_posted": sub_info.get("ngay_dang"),
         "date_expired": sub_info.get("ngay_het_han"),
         "news_type": sub_info.get("loai_tin"),
-        "contact_info": agent_info,
+        "contact_info": fields["agent_info"],
         "verified_status": verified,
         "scraped_at": datetime.now().isoformat()
     }
     final_data = remove_empty_fields(data)
     return final_data
+
+
+def parse_detail_page(html_content, url, backend=None):
+    backend = backend or _default_backend
+    if backend == "lxml":
+        from src.parser_lxml import extract_fields as extract_fields_lxml
+        fields = extract_fields_lxml(html_content)
+    else:
+        fields = extract_fields(html_content)
+    return build_record(html_content, url, fields)
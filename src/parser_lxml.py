@@ -0,0 +1,230 @@
+import re
+import unidecode
+from lxml import etree
+from lxml import html as lxml_html
+from src.parser import MissingElementError, normalize_key, extract_fields as extract_fields_bs4
+
+# Strings inside these tags are skipped by BeautifulSoup.get_text(), so they are skipped here too.
+SKIPPED_TEXT_TAGS = {"script", "style", "template", "rt", "rp"}
+
+
+def _cls(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+XP = {
+    "h1": etree.XPath("(//h1)[1]"),
+    "address": etree.XPath(f"(//span[{_cls('re__pr-short-description')}])[1]"),
+    "price_per_spm": etree.XPath(f"(//span[{_cls('ext')}])[1]"),
+    "description": etree.XPath(f"(//*[{_cls('re__pr-description')}])[1]"),
+    "images": etree.XPath(
+        f"//div[{_cls('re__media-thumb-item')} and {_cls('js__media-thumbs-item')}]"
+    ),
+    "first_img": etree.XPath("(.//img)[1]"),
+    "verified": etree.XPath(f"(//div[{_cls('re__pr-stick-listing-verified')}])[1]"),
+
+    "spec_items": etree.XPath(f"//*[{_cls('re__pr-specs-content-item')}]"),
+    "spec_title": etree.XPath(f"(.//*[{_cls('re__pr-specs-content-item-title')}])[1]"),
+    "spec_value": etree.XPath(f"(.//*[{_cls('re__pr-specs-content-item-value')}])[1]"),
+
+    "sub_items": etree.XPath(f"//div[{_cls('re__pr-short-info-item')}]"),
+    "sub_title": etree.XPath(f"(.//span[{_cls('title')}])[1]"),
+    "sub_value": etree.XPath(f"(.//span[{_cls('value')}])[1]"),
+
+    "contact_box": etree.XPath(f"(//div[{_cls('re__ldp-contact-box')}])[1]"),
+    "agent_name_box": etree.XPath(
+        "(.//div[normalize-space(@class) = 're__agent-infor re__agent-name'])[1]"
+    ),
+    "contact_name": etree.XPath(f"(.//a[{_cls('re__contact-name')}])[1]"),
+    "js_contact_name": etree.XPath(f"(.//a[{_cls('js__agent-contact-name')}])[1]"),
+    "avatar": etree.XPath(f"(//img[{_cls('re__contact-avatar')}])[1]"),
+    "phone": etree.XPath(f"(//div[{_cls('js__phone')}])[1]"),
+    "first_span": etree.XPath("(.//span)[1]"),
+    "first_i": etree.XPath("(.//i)[1]"),
+    "zalo": etree.XPath(f"(//a[{_cls('js__zalo-chat')}])[1]"),
+    "agent_extra": etree.XPath(
+        f"//div[{_cls('agent-deail-infor')}][ancestor::div[{_cls('re__agent-experiment')}]]"
+    ),
+
+    "project_card": etree.XPath(f"(//div[{_cls('re__ldp-project-info')}])[1]"),
+    "project_title": etree.XPath(f"(.//div[{_cls('re__project-title')}])[1]"),
+    "project_configs": etree.XPath(f".//span[{_cls('re__prj-card-config-value')}]"),
+    "project_investor": etree.XPath(
+        f"(.//span[{_cls('re__long-text')}]"
+        f"[preceding-sibling::*[1][self::i and {_cls('re__icon-office--sm')}]"
+        f"[ancestor::span[{_cls('re__prj-card-config-value')}]]])[1]"
+    ),
+    "project_avatar_img": etree.XPath(f"(.//div[{_cls('re__section-avatar')}]//img)[1]"),
+    "project_avatar_link": etree.XPath(f"(.//div[{_cls('re__section-avatar')}]//a)[1]"),
+    "project_listing": etree.XPath(f"(.//a[{_cls('re__link-pr')}]//span)[1]"),
+}
+
+
+def _iter_strings(node):
+    if not isinstance(node.tag, str) or node.tag in SKIPPED_TEXT_TAGS:
+        return
+    if node.text:
+        yield node.text
+    for child in node:
+        yield from _iter_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def get_text(node):
+    """Equivalent of BeautifulSoup's tag.get_text(strip=True)."""
+    return "".join(s.strip() for s in _iter_strings(node))
+
+
+def _first(xpath, node):
+    found = xpath(node)
+    return found[0] if found else None
+
+
+def _first_text(xpath, node, default=None):
+    tag = _first(xpath, node)
+    return get_text(tag) if tag is not None else default
+
+
+def get_specs(root):
+    specs = {}
+    for item in XP["spec_items"](root):
+        label_tag = _first(XP["spec_title"], item)
+        value_tag = _first(XP["spec_value"], item)
+        if label_tag is not None and value_tag is not None:
+            specs[normalize_key(get_text(label_tag))] = get_text(value_tag)
+    return specs
+
+
+def get_sub_info(root):
+    sub_info = {}
+    for item in XP["sub_items"](root):
+        title_tag = _first(XP["sub_title"], item)
+        value_tag = _first(XP["sub_value"], item)
+        if title_tag is not None and value_tag is not None:
+            sub_info[normalize_key(get_text(title_tag))] = get_text(value_tag)
+    return sub_info
+
+
+def get_agent_info(root):
+    agent_info = {}
+    contact_box = _first(XP["contact_box"], root)
+    if contact_box is None:
+        raise MissingElementError("contact box (div.re__ldp-contact-box) not found")
+    agent_infor = _first(XP["agent_name_box"], contact_box)
+    if agent_infor is not None:
+        name_tag = _first(XP["contact_name"], agent_infor)
+        if name_tag is None:
+            name_tag = _first(XP["js_contact_name"], agent_infor)
+        if name_tag is not None:
+            agent_info['name'] = get_text(name_tag)
+            href = name_tag.get('href')
+            if href:
+                agent_info['profile_url'] = href
+    avatar_tag = _first(XP["avatar"], root)
+    if avatar_tag is not None:
+        src = avatar_tag.get('src')
+        if src:
+            agent_info['avatar_url'] = src
+    phone_tag = _first(XP["phone"], root)
+    if phone_tag is not None:
+        phone_span = _first(XP["first_span"], phone_tag)
+        if phone_span is not None:
+            agent_info['phone_invisible'] = get_text(phone_span)
+    zalo_tag = _first(XP["zalo"], root)
+    if zalo_tag is not None:
+        data_href = zalo_tag.get('data-href')
+        if data_href:
+            agent_info['zalo_url'] = data_href
+    for item in XP["agent_extra"](root):
+        label_tag = _first(XP["first_span"], item)
+        value_tag = _first(XP["first_i"], item)
+        if label_tag is not None and value_tag is not None:
+            label = get_text(label_tag).lower()
+            value = get_text(value_tag)
+            if "tham gia" in label:
+                agent_info["join_duration"] = value
+            elif "tin đăng" in label:
+                agent_info["listings"] = value
+    return agent_info
+
+
+def get_project_info(root):
+    project_info = {}
+    card = _first(XP["project_card"], root)
+    if card is None:
+        return project_info
+    title = _first_text(XP["project_title"], card)
+    if title:
+        project_info["name"] = title
+    for item in XP["project_configs"](card):
+        text = get_text(item)
+        aria_label = unidecode.unidecode(item.get("aria-label", "")).lower()
+        if "trang thai" in aria_label:
+            project_info["status"] = text
+        elif "gia" in aria_label:
+            project_info["price"] = text
+    investor = _first_text(XP["project_investor"], card)
+    if investor:
+        project_info["investor"] = investor
+    img = _first(XP["project_avatar_img"], card)
+    if img is not None:
+        src = img.get("src")
+        if src:
+            project_info["image"] = src
+    link = _first(XP["project_avatar_link"], card)
+    if link is not None:
+        href = link.get("href")
+        if href:
+            project_info["project_url"] = href
+    a_tag = _first(XP["project_listing"], card)
+    if a_tag is not None:
+        match = re.search(r'\d+', get_text(a_tag).replace(',', ''))
+        if match:
+            project_info["listing_count"] = int(match.group())
+    return project_info
+
+
+def get_description(root):
+    prefix = "Thông tin mô tả"
+    description_tag = _first(XP["description"], root)
+    if description_tag is None:
+        raise MissingElementError("description (.re__pr-description) not found")
+    description = get_text(description_tag)
+    if description.startswith(prefix):
+        description = description[len(prefix):].strip()
+    return description if description else None
+
+
+def get_images(root):
+    images = []
+    for item in XP["images"](root):
+        img_tag = _first(XP["first_img"], item)
+        if img_tag is not None:
+            img_url = img_tag.get("data-src") or img_tag.get("src")
+            if img_url:
+                images.append(img_url)
+    return images
+
+
+def extract_fields(html_content):
+    root = lxml_html.document_fromstring(html_content)
+    return {
+        "title": _first_text(XP["h1"], root),
+        "address": _first_text(XP["address"], root),
+        "price_per_spm": _first_text(XP["price_per_spm"], root),
+        "description": get_description(root),
+        "images": get_images(root),
+        "project_info": get_project_info(root),
+        "agent_info": get_agent_info(root),
+        "sub_info": get_sub_info(root),
+        "specs": get_specs(root),
+        "verified": _first(XP["verified"], root) is not None,
+    }
+
+
+def compare_backends(html_content):
+    """Return the field names whose lxml output differs from the bs4 backend."""
+    expected = extract_fields_bs4(html_content)
+    actual = extract_fields(html_content)
+    return sorted(key for key in expected if expected[key] != actual.get(key))
@@ -0,0 +1,47 @@
+import argparse
+import sys
+from src.utils import get_logger
+
+logger = get_logger("query_plans")
+
+# One search per search_query() shape used by the notebooks and analytics jobs.
+SAMPLE_SEARCHES = [
+    {"transaction_type": "sale"},
+    {"category": "Apartment"},
+    {"transaction_type": "rent", "category": "Apartment"},
+    {"transaction_type": "sale", "category": "Apartment", "min_price": 2_000_000_000, "max_price": 5_000_000_000},
+    {"transaction_type": "rent", "max_price": 15_000_000},
+    {"province": "Hà Nội"},
+    {"province": "Hồ Chí Minh", "district": "Quận 7"},
+    {"province": "Hồ Chí Minh", "district": "Bình Thạnh", "ward": "Phường 22"},
+    {"province": "Đồng Nai", "district": "Huyện Long Thành", "ward": "Xã Long An"},
+    {"transaction_type": "rent", "category": "Apartment", "province": "Hồ Chí Minh", "district": "Bình Thạnh"},
+    {"text": "Vinhomes"},
+    {"transaction_type": "sale", "text": "Vinhomes"},
+]
+
+
+def check(mongo_client, searches=SAMPLE_SEARCHES):
+    """Log the plan of every search; return False when any of them scans the whole collection."""
+    failures = mongo_client.check_query_plans(searches)
+    for conditions, stages in failures.items():
+        logger.error(f"COLLSCAN for {conditions}: {' > '.join(stages)}")
+    logger.info(f"Checked {len(searches)} search plans: {len(failures)} collection scans")
+    return not failures
+
+
+if __name__ == "__main__":
+    from src.mongo_client import MongoDBClient
+
+    arg_parser = argparse.ArgumentParser(description="Fail if a search helper query is not served by an index.")
+    arg_parser.add_argument("--drop-unmanaged", action="store_true", help="drop indexes that are not in INDEXES first")
+    args = arg_parser.parse_args()
+
+    mongo = MongoDBClient()
+    try:
+        if args.drop_unmanaged:
+            mongo.ensure_indexes(drop_unmanaged=True)
+        ok = check(mongo)
+    finally:
+        mongo.close()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,95 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+from src.utils import get_logger
+
+logger = get_logger("rate_limiter")
+
+DEFAULT_LIMITS = {
+    "initial_rate": 0.5,    # requests per second
+    "min_rate": 0.1,
+    "max_rate": 3.0,
+    "increase": 0.05,       # additive step after each clean response
+    "decrease": 0.5,        # multiplicative factor on throttling
+    "burst": 1,
+    "jitter": 0.2,          # extra random wait, as a fraction of the computed delay
+}
+
+
+class HostBucket:
+    def __init__(self, initial_rate, min_rate, max_rate, increase, decrease, burst, jitter):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self.tokens = float(self.burst)
+        self.last = time.monotonic()
+
+
+class AdaptiveRateLimiter:
+    """Token bucket per host whose refill rate grows additively while requests
+    succeed and shrinks multiplicatively on timeouts, 429s or challenge pages."""
+
+    def __init__(self, **defaults):
+        self.defaults = {**DEFAULT_LIMITS, **defaults}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url):
+        return urlparse(url).netloc.lower()
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = HostBucket(**self.defaults)
+            self._buckets[host] = bucket
+        return bucket
+
+    def configure(self, url, **limits):
+        settings = {**self.defaults, **{k: v for k, v in limits.items() if k in DEFAULT_LIMITS}}
+        host = self.host_of(url)
+        with self._lock:
+            current = self._buckets.get(host)
+            bucket = HostBucket(**settings)
+            if current is not None:
+                bucket.rate = min(max(current.rate, bucket.min_rate), bucket.max_rate)
+            self._buckets[host] = bucket
+
+    def reserve(self, url):
+        with self._lock:
+            bucket = self._bucket(self.host_of(url))
+            now = time.monotonic()
+            bucket.tokens = min(bucket.burst, bucket.tokens + (now - bucket.last) * bucket.rate)
+            bucket.last = now
+            bucket.tokens -= 1
+            if bucket.tokens >= 0:
+                return 0.0
+            delay = -bucket.tokens / bucket.rate
+            return delay * (1 + random.uniform(0, bucket.jitter))
+
+    def acquire(self, url):
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_success(self, url):
+        with self._lock:
+            bucket = self._bucket(self.host_of(url))
+            bucket.rate = min(bucket.max_rate, bucket.rate + bucket.increase)
+
+    def on_throttle(self, url, reason="throttled"):
+        host = self.host_of(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.rate = max(bucket.min_rate, bucket.rate * bucket.decrease)
+            rate = bucket.rate
+        logger.warning(f"Backing off {host} ({reason}): rate now {rate:.2f} req/s")
+
+    def current_rate(self, url):
+        with self._lock:
+            return self._bucket(self.host_of(url)).rate
@@ -0,0 +1,87 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from src.archive import iter_entries, read_blob
+from src.cleaner import iter_chunks
+from src.gazetteer import configure_gazetteer
+from src.parser import parse_detail_page
+from src.utils import get_logger
+
+logger = get_logger("reparse")
+
+
+def _parse_entry(root, entry, backend):
+    try:
+        html_content = read_blob(root, entry)
+        record = parse_detail_page(html_content, entry["url"], backend=backend)
+    except Exception as e:
+        return None, f"{entry['post_id']}: {e}"
+    # Keep the time the page was actually fetched, not the time it was re-parsed.
+    record["scraped_at"] = entry["archived_at"]
+    return record, None
+
+
+def _parse_batch(args):
+    root, entries, backend = args
+    return [_parse_entry(root, entry, backend) for entry in entries]
+
+
+def reparse_archive(archive_root, mongo_client, workers=None, batch_size=500, backend="bs4", gazetteer_path=None,
+                    parse_chunk=64):
+    stats = {"parsed": 0, "errors": 0, "inserted": 0, "modified": 0, "unchanged": 0, "failed": 0}
+    workers = workers or os.cpu_count() or 1
+    # At most this many parse batches are queued or finished-but-unconsumed at any time.
+    window = workers * 2
+    logger.info(f"Re-parsing archived pages from {archive_root} on {workers} processes...")
+    start = time.time()
+
+    def parsed_records(pool):
+        pending = deque()
+        for entries in iter_chunks(iter_entries(archive_root), parse_chunk):
+            pending.append(pool.submit(_parse_batch, (archive_root, entries, backend)))
+            # Submission is pulled by the upserts consuming this generator, so parsing
+            # never runs more than `window` batches ahead of the writes.
+            while len(pending) >= window:
+                yield from collect(pending.popleft())
+        while pending:
+            yield from collect(pending.popleft())
+
+    def collect(future):
+        for record, error in future.result():
+            if error:
+                stats["errors"] += 1
+                logger.warning(f"Re-parse failed for {error}")
+                continue
+            stats["parsed"] += 1
+            yield record
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=configure_gazetteer, initargs=(gazetteer_path,)) as pool:
+        stats.update(mongo_client.upsert_many_posts(parsed_records(pool), chunk_size=batch_size))
+
+    elapsed = max(time.time() - start, 1e-9)
+    logger.info(
+        f"Re-parsed {stats['parsed']} pages ({stats['errors']} errors) in {elapsed:.1f}s "
+        f"({stats['parsed'] / elapsed:.0f} pages/s): {stats['inserted']} inserted, {stats['modified']} updated, "
+        f"{stats['unchanged']} unchanged, {stats['failed']} failed"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    from src.mongo_client import MongoDBClient
+
+    arg_parser = argparse.ArgumentParser(description="Re-parse archived detail pages and upsert them into MongoDB.")
+    arg_parser.add_argument("--archive", default="data/archive")
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--batch-size", type=int, default=500)
+    arg_parser.add_argument("--backend", choices=["bs4", "lxml"], default="bs4")
+    arg_parser.add_argument("--gazetteer", default=None, help="JSON gazetteer extending the built-in one")
+    args = arg_parser.parse_args()
+
+    mongo = MongoDBClient()
+    try:
+        reparse_archive(args.archive, mongo, args.workers, args.batch_size, args.backend, args.gazetteer)
+    finally:
+        mongo.close()
@@ -1,11 +1,15 @@
-import time
-import random
+import queue
+import threading
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
-from src.parser import parse_detail_page, get_post_id, classify_transaction_type
+from selenium.common.exceptions import TimeoutException
+from src.parser import parse_detail_page, parse_list_cards, classify_transaction_type
+from src.fetcher import USER_AGENT, looks_like_challenge
+from src.rate_limiter import AdaptiveRateLimiter
+from src.archive import archive_html
+from src.writer import BufferedPostWriter
 from src.utils import get_logger, save_json
 
 logger = get_logger("scraper")
@@ -19,7 +23,29 @@ def safe_quit_driver(self):
 uc.Chrome.__del__ = safe_quit_driver
 
 
-def init_browser(headless=True):
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*facebook.com/tr*",
+    "*hotjar.com*", "*clarity.ms*", "*analytics.tiktok.com*",
+    "*maps.googleapis.com*", "*maps.gstatic.com*",
+]
+
+LEAN_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+}
+
+
+def enable_request_blocking(driver, patterns=None):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns or LEAN_BLOCKED_URLS})
+
+
+def init_browser(headless=True, lean=False, page_load_strategy=None):
     logger.info("Initializing driver...")
     options = uc.ChromeOptions()
     if headless:
@@ -29,16 +55,20 @@ def init_browser(headless=True):
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-extensions")
-    user_agent = (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    )
-    options.add_argument(f'--user-agent={user_agent}')
+    options.add_argument(f'--user-agent={USER_AGENT}')
+    if page_load_strategy:
+        options.page_load_strategy = page_load_strategy
+    if lean:
+        # Only the DOM is parsed; image URLs are read from data-src/src attributes.
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--mute-audio")
+        options.add_experimental_option("prefs", LEAN_PREFS)
 
     try:
         driver = uc.Chrome(options=options)
         driver.set_page_load_timeout(60)
+        if lean:
+            enable_request_blocking(driver)
         return driver
 
     except Exception as e:
@@ -46,66 +76,223 @@ def init_browser(headless=True):
         raise
 
 
-def fetch_list_links(driver, page_url, mongo_client):
+def load_page(driver, url, locator, limiter):
+    limiter.acquire(url)
+    try:
+        driver.get(url)
+        WebDriverWait(driver, 15).until(EC.presence_of_element_located(locator))
+    except TimeoutException:
+        try:
+            challenged = looks_like_challenge(200, driver.page_source)
+        except Exception:
+            challenged = False
+        limiter.on_throttle(url, "challenge page" if challenged else "timeout")
+        raise
+
+    limiter.on_success(url)
+    return driver.page_source
+
+
+def scan_list_page(driver, page_url, limiter):
+    html_content = load_page(driver, page_url, (By.CLASS_NAME, "js__card"), limiter)
+    return parse_list_cards(html_content, page_url)
+
+
+def fetch_list_links(driver, page_url, mongo_client, limiter):
     logger.info(f"Scanning: {page_url}")
     links = []
     skipped = 0
 
     try:
-        driver.get(page_url)
-        wait = WebDriverWait(driver, 15)
-        wait.until(EC.presence_of_element_located((By.CLASS_NAME, "js__card")))
-        items = driver.find_elements(By.CLASS_NAME, "js__card")
-        type_post = classify_transaction_type(page_url)
-
-        for item in items:
-            try:
-                link_tag = item.find_element(By.TAG_NAME, "a")
-                url = link_tag.get_attribute("href")
-                pid = get_post_id(url)
-
-                if pid and not mongo_client.check_duplicated(pid, type_post):
-                    links.append((url, pid))
-                else:
-                    skipped += 1
-
-            except (NoSuchElementException, StaleElementReferenceException):
-                continue
+        cards = scan_list_page(driver, page_url, limiter)
+
+        # Category pages (/nha-dat-ban) classify as "Unknown"; stored posts carry the type of their detail URL.
+        candidates = []
+        for card in cards:
+            if card["post_id"]:
+                candidates.append(((card["post_id"], classify_transaction_type(card["url"])), card))
+            else:
+                skipped += 1
 
-        logger.info(f"Fetched {len(links)} new links from list page (Skipped {skipped} duplicates)")
+        stored = mongo_client.get_fingerprints([key for key, _ in candidates])
+        changed = 0
+        unfingerprinted = {}
+        for key, card in candidates:
+            if key not in stored:
+                links.append((card["url"], card["post_id"], card["fingerprint"]))
+            elif stored[key] is None:
+                # Stored before fingerprints existed: record one now, re-scrape on the next change.
+                unfingerprinted[key] = card["fingerprint"]
+                skipped += 1
+            elif stored[key] != card["fingerprint"]:
+                links.append((card["url"], card["post_id"], card["fingerprint"]))
+                changed += 1
+            else:
+                skipped += 1
+
+        mongo_client.set_fingerprints(unfingerprinted)
+        logger.info(
+            f"Fetched {len(links)} links from list page ({len(links) - changed} new, {changed} changed; "
+            f"Skipped {skipped} unchanged)"
+        )
     except Exception as e:
+        # None (not []) so the caller can tell a page that failed to load from one with nothing new.
         logger.error(f"Error fetching list links: {e}")
+        return None, 0
 
     return links, skipped
 
 
-def process_single_page(driver, links, mongo_client):
+def save_detail(html_content, url, pid, writer, fingerprint=None):
+    # Archive before parsing so pages with unexpected markup can be re-parsed later.
+    archive_html(pid, url, html_content, classify_transaction_type(url))
+    data = parse_detail_page(html_content, url)
+    if data is None:
+        return False
+
+    if fingerprint:
+        data["list_fingerprint"] = fingerprint
+    save_json([data])
+    writer.add(data)
+    logger.info(f"--> Queued {pid} for MongoAtlas")
+    return True
+
+
+def process_detail(driver, url, pid, fingerprint, writer, limiter):
+    html_content = load_page(driver, url, (By.CSS_SELECTOR, "h1.re__pr-title"), limiter)
+    return save_detail(html_content, url, pid, writer, fingerprint)
+
+
+def process_links_http(fetcher, links, writer):
     count = 0
-    for i, (url, pid) in enumerate(links):
+    fallback = []
+    pages = fetcher.fetch_many([url for url, _, _ in links])
+
+    for url, pid, fingerprint in links:
+        html_content = pages.get(url)
+        if html_content is None:
+            fallback.append((url, pid, fingerprint))
+            continue
         try:
-            logger.info(f"Processing detail [{i + 1}/{len(links)}]: {pid}")
-            driver.get(url)
+            if save_detail(html_content, url, pid, writer, fingerprint):
+                count += 1
+        except Exception as e:
+            logger.warning(f"--> HTTP parse failed for {pid}, retrying in browser: {e}")
+            fallback.append((url, pid, fingerprint))
 
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "h1.re__pr-title"))
-            )
+    logger.info(f"HTTP fetched {count}/{len(links)} details ({len(fallback)} sent to browser)")
+    return count, fallback
 
-            html_content = driver.page_source
-            data = parse_detail_page(html_content, url)
-            if data is not None:
-                save_json([data])
-                mongo_client.insert_post(data)
+
+def process_single_page(driver, links, writer, limiter):
+    count = 0
+    for i, (url, pid, fingerprint) in enumerate(links):
+        try:
+            logger.info(f"Processing detail [{i + 1}/{len(links)}]: {pid}")
+            if process_detail(driver, url, pid, fingerprint, writer, limiter):
                 count += 1
+        except Exception as e:
+            logger.warning(f"--> Skipping {pid} due to error: {e}")
+    return count
+
+
+def init_browser_pool(size, headless=True, lean=False, page_load_strategy=None):
+    drivers = []
+    try:
+        for _ in range(max(1, size)):
+            drivers.append(init_browser(
+                headless=headless,
+                lean=lean,
+                page_load_strategy=page_load_strategy
+            ))
+    except Exception:
+        close_browser_pool(drivers)
+        raise
+    logger.info(f"Browser pool ready with {len(drivers)} worker(s)")
+    return drivers
 
-                logger.info(f"--> Saved {pid} to MongoAtlas")
 
-            time.sleep(random.uniform(2, 4))
+def close_browser_pool(drivers):
+    for driver in drivers:
+        try:
+            driver.quit()
         except Exception as e:
-            logger.warning(f"--> Skipping {pid} due to error: {e}")
+            logger.warning(f"Failed to close browser: {e}")
+
+
+def _pool_worker(worker_id, driver, jobs, total, writer, limiter, counter):
+    while True:
+        try:
+            i, url, pid, fingerprint = jobs.get_nowait()
+        except queue.Empty:
+            return
+
+        try:
+            logger.info(f"[worker {worker_id}] Processing detail [{i + 1}/{total}]: {pid}")
+            if process_detail(driver, url, pid, fingerprint, writer, limiter):
+                with counter["lock"]:
+                    counter["count"] += 1
+        except Exception as e:
+            logger.warning(f"[worker {worker_id}] --> Skipping {pid} due to error: {e}")
+
+
+def process_links_parallel(drivers, links, writer, limiter):
+    if len(drivers) <= 1:
+        return process_single_page(drivers[0], links, writer, limiter)
+
+    jobs = queue.Queue()
+    for i, (url, pid, fingerprint) in enumerate(links):
+        jobs.put((i, url, pid, fingerprint))
+
+    counter = {"count": 0, "lock": threading.Lock()}
+    threads = [
+        threading.Thread(
+            target=_pool_worker,
+            args=(worker_id, driver, jobs, len(links), writer, limiter, counter),
+            name=f"scraper-worker-{worker_id}",
+            daemon=True,
+        )
+        for worker_id, driver in enumerate(drivers, start=1)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return counter["count"]
+
+
+def process_links(links, driver, writer, limiter, pool=None, fetcher=None):
+    count = 0
+    if fetcher is not None:
+        count, links = process_links_http(fetcher, links, writer)
+
+    if links:
+        if pool:
+            count += process_links_parallel(pool, links, writer, limiter)
+        else:
+            count += process_single_page(driver, links, writer, limiter)
     return count
 
 
-def process_multiple_pages(driver, target, mongo_client):
+def _complete_page(checkpoint, name, page, writer):
+    if checkpoint is None:
+        return
+    # Buffered posts must reach MongoDB before the page is recorded as done.
+    writer.flush()
+    checkpoint.mark_page_done(name, page)
+
+
+def process_multiple_pages(
+        driver,
+        target,
+        mongo_client,
+        pool=None,
+        fetcher=None,
+        writer=None,
+        limiter=None,
+        checkpoint=None
+):
     name = target.get("name")
     base_url = target.get("url")
     start_page = target.get("start_page", 1)
@@ -115,24 +302,79 @@ def process_multiple_pages(driver, target, mongo_client):
     total_skipped = 0
     pages_processed = 0
 
-    logger.info(f"=== PROCESSING TARGET: {name.upper()} ===")
+    if limiter is None:
+        limiter = AdaptiveRateLimiter()
+    limiter.configure(base_url, **target.get("rate_limit", {}))
 
-    for p in range(start_page, end_page + 1):
-        page_url = base_url if p == 1 else f"{base_url}/p{p}"
-        logger.info(f"=== ACCESSING PAGE {p} ===")
+    owns_writer = writer is None
+    if owns_writer:
+        writer = BufferedPostWriter(mongo_client)
 
-        links, skipped = fetch_list_links(driver, page_url, mongo_client)
-        total_skipped += skipped
+    state = checkpoint.get(name) if checkpoint is not None else None
+    retry_pages = []
+    if state and state.get("last_page"):
+        start_page = max(start_page, state["last_page"] + 1)
+        # Only a walk interrupted part-way has failed pages behind its resume point;
+        # a finished walk restarts from start_page and revisits them in order.
+        retry_pages = sorted(page for page in state.get("failed_pages", []) if page < start_page)
+    failed_pages = []
 
-        if not links:
-            logger.info(f"No new links found on page {p}.")
+    logger.info(f"=== PROCESSING TARGET: {name.upper()} ===")
+
+    try:
+        if state and state.get("pending"):
+            p = state["pending_page"]
+            # Checkpoints written before fingerprints existed hold (url, pid) pairs.
+            links = [tuple(list(link) + [None] * (3 - len(link))) for link in state["pending"]]
+            logger.info(f"=== RESUMING PAGE {p} WITH {len(links)} PENDING LINKS ===")
+
+            total_new += process_links(links, driver, writer, limiter, pool=pool, fetcher=fetcher)
+            _complete_page(checkpoint, name, p, writer)
             pages_processed += 1
-            continue
+            start_page = max(start_page, p + 1)
+
+        elif state and state.get("last_page"):
+            logger.info(f"=== RESUMING {name.upper()} FROM PAGE {start_page} ===")
+
+        if retry_pages:
+            logger.info(f"=== RETRYING PAGES THAT FAILED TO LOAD: {retry_pages} ===")
 
-        inserted_count = process_single_page(driver, links, mongo_client)
-        total_new += inserted_count
+        for p in retry_pages + list(range(start_page, end_page + 1)):
+            page_url = base_url if p == 1 else f"{base_url}/p{p}"
+            logger.info(f"=== ACCESSING PAGE {p} ===")
+
+            links, skipped = fetch_list_links(driver, page_url, mongo_client, limiter)
+            total_skipped += skipped
+
+            if links is None:
+                # Not marked done: the page is retried on the next run until it runs out of attempts.
+                logger.warning(f"List page {p} failed to load.")
+                failed_pages.append(p)
+                if checkpoint is not None:
+                    checkpoint.mark_page_failed(name, p)
+                continue
+
+            if not links:
+                logger.info(f"No new links found on page {p}.")
+                _complete_page(checkpoint, name, p, writer)
+                pages_processed += 1
+                continue
+
+            if checkpoint is not None:
+                checkpoint.save_pending(name, p, links)
+
+            total_new += process_links(links, driver, writer, limiter, pool=pool, fetcher=fetcher)
+            _complete_page(checkpoint, name, p, writer)
+
+            pages_processed += 1
+            logger.info(f"Current rate for {limiter.host_of(base_url)}: {limiter.current_rate(base_url):.2f} req/s")
 
-        pages_processed += 1
-        time.sleep(random.uniform(3, 6))
+        if checkpoint is not None:
+            checkpoint.finish_walk(name)
+        if failed_pages:
+            logger.warning(f"{len(failed_pages)} list pages of {name} failed to load: {failed_pages}")
+    finally:
+        if owns_writer:
+            writer.close()
 
-    return total_new, total_skipped, pages_processed
\ No newline at end of file
+    return total_new, total_skipped, pages_processed
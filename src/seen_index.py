@@ -0,0 +1,137 @@
+import hashlib
+import math
+import os
+import threading
+from src.utils import get_logger
+
+logger = get_logger("seen_index")
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key):
+        """Set the key's bits; returns False (and does not count it) if they were all set already."""
+        new = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def make_key(post_id, transaction_type):
+    return f"{post_id}\t{transaction_type}"
+
+
+class SeenIndex:
+    """Bloom filter over known (post_id, transaction_type) pairs, persisted as an
+    append-only TSV file. A miss is authoritative; a hit still has to be confirmed
+    against MongoDB. IDs that were false positives when added are not persisted,
+    so after a restart roughly error_rate of them are re-scraped once."""
+
+    def __init__(self, path="data/seen_ids.tsv", capacity=2_000_000, error_rate=0.001):
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._handle = None
+        self._capacity_warned = False
+        self.bloom = None
+        self.load()
+
+    def _count_lines(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as f:
+            return sum(1 for _ in f)
+
+    def load(self):
+        existing = self._count_lines()
+        self.bloom = BloomFilter(max(self.capacity, existing * 2), self.error_rate)
+        if existing:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if line:
+                        self.bloom.add(line)
+        logger.info(f"Seen index loaded {self.bloom.count} IDs from {self.path}")
+
+    def __len__(self):
+        return self.bloom.count
+
+    def _get_handle(self):
+        if self._handle is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._handle = open(self.path, "a", encoding="utf-8")
+        return self._handle
+
+    def bootstrap(self, collection, batch_size=10_000):
+        cursor = collection.find(
+            {}, {"_id": 0, "post_id": 1, "transaction_type": 1}, batch_size=batch_size
+        )
+        added = self.add_many(
+            (doc.get("post_id"), doc.get("transaction_type")) for doc in cursor
+        )
+        logger.info(f"Seen index bootstrapped with {added} IDs from MongoDB")
+        return added
+
+    def might_contain(self, post_id, transaction_type):
+        return make_key(post_id, transaction_type) in self.bloom
+
+    def add(self, post_id, transaction_type):
+        return self.add_many([(post_id, transaction_type)])
+
+    def add_many(self, pairs):
+        added = 0
+        with self._lock:
+            handle = self._get_handle()
+            for post_id, transaction_type in pairs:
+                if not post_id:
+                    continue
+                key = make_key(post_id, transaction_type)
+                # Known keys are not written again, so the file and len() grow with distinct IDs.
+                # A false positive here (about error_rate of new IDs) leaves the ID out of the
+                # file. After a restart the rebuilt filter misses it, a miss is final, and the
+                # post is scraped once more as new; that upsert finds it unchanged and adds it again.
+                if not self.bloom.add(key):
+                    continue
+                handle.write(key + "\n")
+                added += 1
+            handle.flush()
+
+        if self.bloom.count > self.bloom.capacity and not self._capacity_warned:
+            self._capacity_warned = True
+            logger.warning(
+                f"Seen index holds {self.bloom.count} IDs, above its capacity "
+                f"{self.bloom.capacity}; false positive rate will rise until restart."
+            )
+        return added
+
+    def close(self):
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
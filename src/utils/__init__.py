@@ -1,4 +1,4 @@
 from .logger import get_logger
-from .helper import load_config, save_json
+from .helper import load_config, save_json, configure_raw_sink, close_raw_sink, open_text, JsonlSink
 
-__all__ = ["get_logger", "load_config", "save_json"]
\ No newline at end of file
+__all__ = ["get_logger", "load_config", "save_json", "configure_raw_sink", "close_raw_sink", "open_text", "JsonlSink"]
@@ -1,8 +1,16 @@
 import yaml
 import os
+import io
+import gzip
 import json
+import threading
 from datetime import datetime
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 def load_config(config_path="config.yaml"):
     if not os.path.exists(config_path):
@@ -13,25 +21,158 @@ def load_config(config_path="config.yaml"):
     return config
 
 
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def open_text(path, mode="r"):
+    """Open a plain, .gz or .zst file in text mode."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("zstandard is required to read/write .zst files")
+        if "r" in mode:
+            raw = zstandard.ZstdDecompressor().stream_reader(
+                open(path, "rb"), read_across_frames=True, closefd=True
+            )
+        else:
+            raw = zstandard.ZstdCompressor().stream_writer(open(path, mode + "b"), closefd=True)
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class JsonlSink:
+    def __init__(
+            self,
+            directory="data/raw",
+            prefix="posts",
+            rotate="daily",
+            max_bytes=256 * 1024 * 1024,
+            compression=None,
+            fsync_every=50
+    ):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstandard is required for zstd compression")
+
+        self.directory = directory
+        self.prefix = prefix
+        self.rotate = rotate
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.fsync_every = max(1, fsync_every)
+
+        self._lock = threading.Lock()
+        self._raw = None
+        self._handle = None
+        self._date_str = None
+        self._part = 0
+        self._pending = 0
+        self.path = None
+
+    def _build_path(self):
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        part = f"_{self._part:03d}" if self.rotate == "size" or self._part else ""
+        return os.path.join(self.directory, f"{self.prefix}_{self._date_str}{part}.jsonl{suffix}")
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        while os.path.exists(self._build_path()):
+            # A compressed file left by a crash has no trailer; a member appended after it
+            # cannot be read, so compressed sinks never reopen a file and start a new part.
+            if self.compression is None and (self.rotate != "size" or os.path.getsize(self._build_path()) < self.max_bytes):
+                break
+            self._part += 1
+        self.path = self._build_path()
+        self._raw = open(self.path, "ab")
+        if self.compression == "gzip":
+            self._handle = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        elif self.compression == "zstd":
+            self._handle = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._handle = self._raw
+
+    def _close_handle(self):
+        if self._handle is None:
+            return
+        self._sync()
+        if self._handle is not self._raw:
+            self._handle.close()
+        self._raw.close()
+        self._handle = None
+        self._raw = None
+
+    def _sync(self):
+        if self._handle is not self._raw:
+            self._handle.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._pending = 0
+
+    def _maybe_rotate(self):
+        date_str = datetime.now().strftime("%Y%m%d")
+        if date_str != self._date_str:
+            self._close_handle()
+            self._date_str = date_str
+            self._part = 0
+        elif self.rotate == "size" and self._raw is not None and self._raw.tell() >= self.max_bytes:
+            self._close_handle()
+            self._part += 1
+
+        if self._handle is None:
+            self._open()
+
+    def write(self, record):
+        self.write_many([record])
+
+    def write_many(self, records):
+        with self._lock:
+            for record in records:
+                self._maybe_rotate()
+                line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+                self._handle.write(line.encode("utf-8"))
+                self._pending += 1
+                if self._pending >= self.fsync_every:
+                    self._sync()
+
+    def close(self):
+        with self._lock:
+            self._close_handle()
+
+
+_raw_sink = None
+_raw_sink_lock = threading.Lock()
+
+
+def configure_raw_sink(**kwargs):
+    global _raw_sink
+    with _raw_sink_lock:
+        if _raw_sink is not None:
+            _raw_sink.close()
+        _raw_sink = JsonlSink(**kwargs)
+    return _raw_sink
+
+
+def close_raw_sink():
+    global _raw_sink
+    with _raw_sink_lock:
+        if _raw_sink is not None:
+            _raw_sink.close()
+            _raw_sink = None
+
+
 def save_json(data):
+    global _raw_sink
     if not data:
         return
 
-    date_str = datetime.now().strftime("%Y%m%d")
-    filename = f"data/raw/posts_{date_str}.json"
-    existing_data = []
-
-    if os.path.exists(filename):
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                existing_data = json.load(f)
-        except (json.JSONDecodeError, Exception):
-            existing_data = []
-
-    existing_data.extend(data)
+    with _raw_sink_lock:
+        if _raw_sink is None:
+            _raw_sink = JsonlSink()
+        sink = _raw_sink
 
     try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=4)
+        sink.write_many(data)
     except Exception as e:
         print(e)
@@ -0,0 +1,64 @@
+import threading
+import time
+from src.utils import get_logger
+
+logger = get_logger("writer")
+
+
+class BufferedPostWriter:
+    def __init__(self, mongo_client, max_size=50, max_interval=30, history_limit=20):
+        self.mongo_client = mongo_client
+        self.max_size = max(1, max_size)
+        self.max_interval = max_interval
+        self.history_limit = history_limit
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._timer = None
+        if max_interval and max_interval > 0:
+            self._timer = threading.Thread(target=self._flush_periodically, name="post-writer", daemon=True)
+            self._timer.start()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.max_interval):
+            with self._lock:
+                if self._buffer and time.monotonic() - self._last_flush >= self.max_interval:
+                    self._flush_locked()
+
+    def _flush_locked(self):
+        batch, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        if not batch:
+            return
+
+        result = self.mongo_client.upsert_changed_posts(batch, self.history_limit)
+        self.inserted += result["inserted"]
+        self.updated += result["updated"]
+        self.unchanged += result["unchanged"]
+        self.failed += result["failed"]
+        logger.info(
+            f"Flushed {len(batch)} posts: {result['inserted']} inserted, {result['updated']} updated, "
+            f"{result['unchanged']} unchanged, {result['failed']} failed"
+        )
+
+    def add(self, data):
+        with self._lock:
+            self._buffer.append(data)
+            if len(self._buffer) >= self.max_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
@@ -0,0 +1,42 @@
+import json
+from src.cleaner import iter_raw_records
+
+
+def records(count):
+    return [
+        {"post_id": str(i), "title": f"Tin {i}", "spec": {"bedroom": "2 phòng"}, "images": ["a.jpg"]}
+        for i in range(count)
+    ]
+
+
+def test_pretty_printed_array_truncated_by_crash(tmp_path):
+    path = tmp_path / "raw.json"
+    text = json.dumps(records(50), ensure_ascii=False, indent=4)
+    path.write_text(text[:len(text) // 2], encoding="utf-8")
+
+    read = list(iter_raw_records(str(path), read_size=512))
+
+    assert read == records(50)[:len(read)]
+    assert len(read) > 0
+
+
+def test_pretty_printed_array_with_corrupt_record(tmp_path):
+    path = tmp_path / "raw.json"
+    text = json.dumps(records(20), ensure_ascii=False, indent=4)
+    broken = text.replace('"title": "Tin 5"', '"title": Tin 5', 1)
+    path.write_text(broken, encoding="utf-8")
+
+    read = list(iter_raw_records(str(path), read_size=256))
+
+    assert read == [item for item in records(20) if item["post_id"] != "5"]
+
+
+def test_jsonl_with_corrupt_line(tmp_path):
+    path = tmp_path / "raw.jsonl"
+    lines = [json.dumps(item, ensure_ascii=False) for item in records(10)]
+    lines[3] = lines[3][:-5]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    read = list(iter_raw_records(str(path), read_size=64))
+
+    assert read == [item for item in records(10) if item["post_id"] != "3"]
@@ -0,0 +1,51 @@
+from src.cleaner import clean_address
+from src.gazetteer import build_gazetteer, normalize_address
+
+
+def test_table_district_is_unprefixed():
+    address = clean_address("12 Đường D1, Phường 25, Quận Bình Thạnh, TP. Hồ Chí Minh")
+
+    assert address == {"City": "Hồ Chí Minh", "District": "Bình Thạnh", "Ward": "Phường 25", "Street": "12 Đường D1"}
+
+
+def test_numbered_district_keeps_quan():
+    assert clean_address("123 Lê Lợi, Quận 01, Hồ Chí Minh")["District"] == "Quận 1"
+
+
+def test_prefixed_district_outside_table_is_unprefixed():
+    assert clean_address("Xã Long An, Huyện Long Thành, Đồng Nai")["District"] == "Long Thành"
+    assert clean_address("Phú Hòa, Thành phố Thủ Dầu Một, Bình Dương")["District"] == "Thủ Dầu Một"
+    assert clean_address("Phú Hòa, TP. Thủ Dầu Một, Bình Dương")["District"] == "Thủ Dầu Một"
+    assert normalize_address("Huyện Long Thành, Đồng Nai")["district_key"] == "long thanh"
+
+
+def test_positional_district_and_ward():
+    address = clean_address("Đường 25B, Phước An, Nhơn Trạch, Đồng Nai")
+
+    assert address == {"City": "Đồng Nai", "District": "Nhơn Trạch", "Ward": "Phước An", "Street": "Đường 25B"}
+
+
+def test_unprefixed_ward_under_table_district():
+    address = clean_address("Đường Nguyễn Văn Linh, Tân Phong, Quận 7, Hồ Chí Minh")
+
+    assert address == {"City": "Hồ Chí Minh", "District": "Quận 7", "Ward": "Tân Phong", "Street": "Đường Nguyễn Văn Linh"}
+
+
+def test_unprefixed_ward_under_prefixed_district():
+    address = clean_address("Phú Hòa, Thành phố Thủ Dầu Một, Bình Dương")
+
+    assert address["Ward"] == "Phú Hòa"
+    assert address["Street"] == ""
+
+
+def test_ward_table_is_authoritative():
+    gazetteer = build_gazetteer({"provinces": [{
+        "code": "79", "name": "Hồ Chí Minh",
+        "districts": [{"code": "778", "name": "Quận 7", "wards": [{"code": "27475", "name": "Tân Phong"}]}],
+    }]})
+
+    known = gazetteer.normalize("Tân Phong, Quận 7, Hồ Chí Minh")
+    unknown = gazetteer.normalize("Nguyễn Văn Linh, Quận 7, Hồ Chí Minh")
+
+    assert (known["ward"], known["ward_code"]) == ("Tân Phong", "27475")
+    assert (unknown["ward"], unknown["street"]) == (None, "Nguyễn Văn Linh")
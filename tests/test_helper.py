@@ -0,0 +1,18 @@
+from src.cleaner import iter_raw_records
+from src.utils.helper import JsonlSink
+
+
+def test_compressed_sink_reopened_after_crash_starts_new_part(tmp_path):
+    sink = JsonlSink(str(tmp_path), compression="gzip", fsync_every=1)
+    sink.write_many([{"post_id": str(i)} for i in range(3)])
+    crashed_path = sink.path
+    # Crash: the gzip member is never terminated.
+    sink._raw.close()
+
+    restarted = JsonlSink(str(tmp_path), compression="gzip", fsync_every=1)
+    restarted.write({"post_id": "3"})
+    restarted.close()
+
+    assert restarted.path != crashed_path
+    assert [r["post_id"] for r in iter_raw_records(crashed_path)] == ["0", "1", "2"]
+    assert [r["post_id"] for r in iter_raw_records(restarted.path)] == ["3"]